@@ -0,0 +1,38 @@
+import argparse
+from typing import Optional
+
+from gateway import OGP_PRODUCTS_URL
+from http_cache import ResponseCache
+from synthetic import get_synthetic_site
+
+DEFAULT_FIXTURE_PRODUCTS = 200
+DEFAULT_FIXTURE_PEOPLE = 800
+
+
+def get_product_info_fixtures(
+    fixtures_dir: Optional[str] = None,
+    products: int = DEFAULT_FIXTURE_PRODUCTS,
+    people: int = DEFAULT_FIXTURE_PEOPLE,
+) -> list[str]:
+    """Product detail pages of a synthetic site, or those recorded in fixtures_dir
+    (a fixture set or the response cache of a previous crawl) when given"""
+    if fixtures_dir is None:
+        pages = get_synthetic_site(products, people).pages.items()
+    else:
+        pages = (
+            (cached_response.url, cached_response.text)
+            for cached_response in ResponseCache(fixtures_dir).iter_cached_responses()
+        )
+    return [
+        text
+        for url, text in pages
+        if url.startswith(OGP_PRODUCTS_URL) and url != OGP_PRODUCTS_URL
+    ]
+
+
+def add_fixture_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--products", type=int, default=DEFAULT_FIXTURE_PRODUCTS)
+    parser.add_argument("--people", type=int, default=DEFAULT_FIXTURE_PEOPLE)
+    parser.add_argument(
+        "--fixtures-dir", help="use recorded pages instead of a synthetic site"
+    )
@@ -0,0 +1,74 @@
+"""Cold start of the offline solve, measured in fresh interpreters.
+
+Run from the repository root, next to data.json:
+python -m benchmarks.bench_cold_start
+Exits non-zero when the fastest run exceeds the target, or when the solve
+imports any of the crawling or serving dependencies.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPEAT = 5
+# Wall clock seconds for `python cli.py solve`, interpreter start-up included
+TARGET_SECONDS = float(os.environ.get("OGP_COLD_START_TARGET_SECONDS", "0.5"))
+HEAVY_MODULES = (
+    "bs4",
+    "fastapi",
+    "httpx",
+    "lxml",
+    "pydantic",
+    "requests",
+    "scipy",
+    "uvicorn",
+)
+
+_IMPORTED_HEAVY_MODULES_SCRIPT = f"""
+import sys
+import cli
+cli.main(["solve", "--output", sys.argv[1]])
+print(",".join(sorted(
+    {{name.split(".")[0] for name in sys.modules}} & set({HEAVY_MODULES!r})
+)))
+"""
+
+
+def _get_best_seconds(command: list[str]) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_path = os.path.join(output_dir, "data.csv")
+        interpreter_seconds = _get_best_seconds([sys.executable, "-c", "pass"])
+        solve_seconds = _get_best_seconds(
+            [sys.executable, "cli.py", "solve", "--output", output_path]
+        )
+        imported_heavy_modules_line = subprocess.run(
+            [sys.executable, "-c", _IMPORTED_HEAVY_MODULES_SCRIPT, output_path],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.splitlines()[-1]
+    imported_heavy_modules = [i for i in imported_heavy_modules_line.split(",") if i]
+
+    print(f"interpreter start-up: {interpreter_seconds * 1000:.0f} ms")
+    print(
+        f"cli.py solve: {solve_seconds * 1000:.0f} ms "
+        f"(target {TARGET_SECONDS * 1000:.0f} ms), best of {REPEAT}"
+    )
+    print(f"heavy modules imported: {', '.join(imported_heavy_modules) or 'none'}")
+    if solve_seconds > TARGET_SECONDS or imported_heavy_modules:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Memory held by a synthetic 1M-row contributions dataset as per-instance
+__dict__ dataclasses, as slotted Contribution records and as columns.
+
+Run from the repository root: python -m benchmarks.bench_contribution_memory
+"""
+
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+
+from columnar import get_contribution_columns
+from contribution import Contribution
+
+ROW_COUNT = 1_000_000
+PRODUCT_COUNT = 5_000
+TEAM_MEMBER_COUNT = 20_000
+
+PRODUCT_NAMES = [f"product-{i}" for i in range(PRODUCT_COUNT)]
+TEAM_MEMBER_NAMES = [f"Team Member {i}" for i in range(TEAM_MEMBER_COUNT)]
+
+
+@dataclass
+class _DictContribution:
+    product_name: str
+    team_member_name: str
+    team_member_contribution: float
+    team_member_title: str
+    product_salary_cost: float
+
+
+def _get_row(i: int) -> tuple[str, str, float, str, float]:
+    return (
+        PRODUCT_NAMES[i % PRODUCT_COUNT],
+        TEAM_MEMBER_NAMES[i % TEAM_MEMBER_COUNT],
+        0.5,
+        "Software Engineer",
+        100_000.0,
+    )
+
+
+def _get_retained_bytes(load: Callable[[], object]) -> int:
+    tracemalloc.start()
+    loaded = load()
+    retained_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del loaded
+    return retained_bytes
+
+
+def _get_columns():
+    rows = (
+        dict(
+            zip(
+                (
+                    "product_name",
+                    "team_member_name",
+                    "team_member_contribution",
+                    "team_member_title",
+                    "product_salary_cost",
+                ),
+                _get_row(i),
+            )
+        )
+        for i in range(ROW_COUNT)
+    )
+    return get_contribution_columns(list(rows))
+
+
+def main() -> None:
+    loaders = {
+        "dataclass with __dict__": lambda: [
+            _DictContribution(*_get_row(i)) for i in range(ROW_COUNT)
+        ],
+        "slotted Contribution": lambda: [
+            Contribution(*_get_row(i)) for i in range(ROW_COUNT)
+        ],
+        "columns": _get_columns,
+    }
+    print(f"{ROW_COUNT} contributions")
+    for name, load in loaders.items():
+        print(f"{name}: {_get_retained_bytes(load) / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Peak memory of building the contribution matrix from a stream of products
+versus from a fully materialised contributions list. Needs scipy: poetry install
+--extras sparse
+
+Run from the repository root: python -m benchmarks.bench_contribution_stream
+"""
+
+import tracemalloc
+from typing import Callable, Iterator
+
+# Imported before tracing starts, so the first measurement does not count
+# loading scipy.sparse, which the sparse matrix build would otherwise import
+import scipy.sparse  # noqa: F401
+
+from contribution import Contribution, _get_current_product_contribution_matrix
+
+TEAM_SIZE = 8
+TEAM_MEMBER_COUNT = 2_000
+
+
+def iter_synthetic_contributions(product_count: int) -> Iterator[Contribution]:
+    for product in range(product_count):
+        for i in range(TEAM_SIZE):
+            team_member = (product * TEAM_SIZE + i) % TEAM_MEMBER_COUNT
+            yield Contribution(
+                product_name=f"product-{product}",
+                team_member_name=f"Team Member {team_member}",
+                team_member_contribution=1 / TEAM_SIZE,
+                team_member_title="Software Engineer",
+                product_salary_cost=100_000.0,
+            )
+
+
+def _get_peak_bytes(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    build()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak_bytes
+
+
+def main() -> None:
+    for product_count in (500, 1_000, 2_000, 4_000):
+        streamed = _get_peak_bytes(
+            lambda: _get_current_product_contribution_matrix(
+                iter_synthetic_contributions(product_count), use_sparse=True
+            )
+        )
+        materialised = _get_peak_bytes(
+            lambda: _get_current_product_contribution_matrix(
+                list(iter_synthetic_contributions(product_count)), use_sparse=True
+            )
+        )
+        row_count = product_count * TEAM_SIZE
+        print(
+            f"{product_count} products: "
+            f"streamed {streamed / 1024:.0f} KiB peak "
+            f"({streamed / row_count:.0f} B/row), "
+            f"materialised {materialised / 1024:.0f} KiB peak "
+            f"({materialised / row_count:.0f} B/row)"
+        )
+
+
+if __name__ == "__main__":
+    main()
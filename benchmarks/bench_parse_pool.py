@@ -0,0 +1,63 @@
+"""Product page parsing in a process pool at increasing worker counts.
+
+Pages come from a synthetic site, so no crawl is needed:
+python -m benchmarks.bench_parse_pool --products 500
+Pages recorded by a crawl can be used instead:
+python -m benchmarks.bench_parse_pool --fixtures-dir .cache/http
+"""
+
+import argparse
+import os
+import time
+
+from benchmarks._fixtures import add_fixture_arguments, get_product_info_fixtures
+from parse_pool import DEFAULT_PARSE_BATCH_SIZE, map_parse
+from products import get_ogp_product_values
+
+REPEAT = 3
+# Repeats the saved pages so that process start-up is amortised
+FIXTURE_MULTIPLIER = int(os.environ.get("OGP_BENCH_FIXTURE_MULTIPLIER", "10"))
+
+
+def _get_worker_counts() -> list[int]:
+    cpu_count = os.cpu_count() or 1
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= cpu_count:
+        worker_counts.append(worker_counts[-1] * 2)
+    if worker_counts[-1] != cpu_count:
+        worker_counts.append(cpu_count)
+    return worker_counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_fixture_arguments(parser)
+    args = parser.parse_args()
+
+    fixtures = get_product_info_fixtures(args.fixtures_dir, args.products, args.people)
+    if not fixtures:
+        print(f"No product pages found in {args.fixtures_dir}")
+        return
+
+    items = [(html,) for html in fixtures] * FIXTURE_MULTIPLIER
+    print(
+        f"{len(items)} product pages, batch size {DEFAULT_PARSE_BATCH_SIZE}, "
+        f"best of {REPEAT}"
+    )
+    baseline_seconds = None
+    for worker_count in _get_worker_counts():
+        timings = []
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            map_parse(get_ogp_product_values, items, worker_count)
+            timings.append(time.perf_counter() - start)
+        seconds = min(timings)
+        baseline_seconds = baseline_seconds or seconds
+        print(
+            f"{worker_count} worker(s): {seconds * 1000:.1f} ms "
+            f"({baseline_seconds / seconds:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""End-to-end offline benchmark timing crawl, parse, matrix build and solve
+separately.
+
+Pages are replayed from a fixture set through gateway.use_fixtures, so no
+request reaches open.gov.sg. By default a synthetic site is generated:
+python -m benchmarks.bench_pipeline --products 200 --people 800
+A recorded crawl can be replayed instead by pointing at its cache directory:
+python -m benchmarks.bench_pipeline --fixtures-dir .cache/http
+"""
+
+import argparse
+import tempfile
+import time
+from typing import Callable, TypeVar
+
+import gateway
+from concurrency import DEFAULT_MAX_WORKERS, map_concurrently
+from contribution import Contribution, _get_current_product_contribution_matrix
+from http_cache import ResponseCache
+from parse_pool import DEFAULT_PARSE_BATCH_SIZE, map_parse
+from products import (
+    _get_ogp_product_from_values,
+    _get_ogp_products_base,
+    get_ogp_product_values,
+)
+from solver import solve_least_squares
+from synthetic import get_synthetic_site, save_fixtures
+from team_member import get_team_member_from_values, get_team_member_values
+
+T = TypeVar("T")
+
+
+def _time_stage(name: str, repeat: int, run: Callable[[], T]) -> T:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - start)
+    print(f"{name}: {min(timings) * 1000:.1f} ms")
+    return result
+
+
+def _crawl(urls: list[str], max_workers: int) -> dict[str, str]:
+    """Fetches every URL through the gateway into an empty response cache"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        gateway.response_cache = ResponseCache(cache_dir)
+        pages = map_concurrently(
+            gateway.get_ogp_api_product_info_response, urls, max_workers
+        )
+    for url, page in zip(urls, pages):
+        if isinstance(page, Exception):
+            raise page
+    return dict(zip(urls, pages))
+
+
+def _parse(pages: dict[str, str], parse_workers: int) -> list[Contribution]:
+    ogp_products_base = _get_ogp_products_base(pages[gateway.OGP_PRODUCTS_URL])
+    ogp_products = [
+        _get_ogp_product_from_values(ogp_product_base, ogp_product_values)
+        for ogp_product_base, ogp_product_values in zip(
+            ogp_products_base,
+            map_parse(
+                get_ogp_product_values,
+                ((pages[i.path],) for i in ogp_products_base),
+                parse_workers,
+                DEFAULT_PARSE_BATCH_SIZE,
+            ),
+        )
+    ]
+    team_members = list(
+        {
+            team_member.path: team_member
+            for ogp_product in ogp_products
+            for team_member in ogp_product.team_members
+        }.values()
+    )
+    team_members_by_path = {
+        team_member.path: get_team_member_from_values(team_member_values)
+        for team_member, team_member_values in zip(
+            team_members,
+            map_parse(
+                get_team_member_values,
+                ((pages[i.path], i.default_name) for i in team_members),
+                parse_workers,
+                DEFAULT_PARSE_BATCH_SIZE,
+            ),
+        )
+    }
+    return [
+        Contribution(
+            product_name=ogp_product.name,
+            team_member_name=team_members_by_path[team_member.path].name,
+            team_member_contribution=team_member.involvement,
+            team_member_title=team_members_by_path[team_member.path].title,
+            product_salary_cost=ogp_product.cost.salary,
+        )
+        for ogp_product in ogp_products
+        for team_member in ogp_product.team_members
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--people", type=int, default=400)
+    parser.add_argument("--fixtures-dir", help="replay a recorded crawl instead")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--parse-workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as synthetic_dir:
+        if args.fixtures_dir is None:
+            synthetic_site = get_synthetic_site(args.products, args.people)
+            save_fixtures(synthetic_dir, synthetic_site.pages)
+            fixtures_dir = synthetic_dir
+            print(f"Synthetic site: {args.products} products x {args.people} people")
+        else:
+            fixtures_dir = args.fixtures_dir
+            print(f"Recorded fixtures: {fixtures_dir}")
+        gateway.use_fixtures(fixtures_dir)
+        urls = [i.url for i in ResponseCache(fixtures_dir).iter_cached_responses()]
+
+        pages = _time_stage(
+            f"crawl ({len(urls)} pages)",
+            args.repeat,
+            lambda: _crawl(urls, args.max_workers),
+        )
+    contributions = _time_stage(
+        "parse", args.repeat, lambda: _parse(pages, args.parse_workers)
+    )
+    product_contribution_matrix = _time_stage(
+        f"matrix build ({len(contributions)} contributions)",
+        args.repeat,
+        lambda: _get_current_product_contribution_matrix(contributions),
+    )
+    _time_stage(
+        f"solve {product_contribution_matrix.matrix.shape}",
+        args.repeat,
+        lambda: solve_least_squares(
+            product_contribution_matrix.matrix,
+            product_contribution_matrix.quarterly_product_costs,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Single-parse product page extraction versus the previous two-parse version.
+
+Pages come from a synthetic site, so no crawl is needed:
+python -m benchmarks.bench_products
+Pages recorded by a crawl can be used instead:
+python -m benchmarks.bench_products --fixtures-dir .cache/http
+Set OGP_HTML_PARSER=lxml to also time the opt-in lxml parser.
+"""
+
+import argparse
+import timeit
+
+from bs4 import BeautifulSoup
+
+from benchmarks._fixtures import add_fixture_arguments, get_product_info_fixtures
+from gateway import (
+    CORPORATE_OVERHEAD_HTML_TAG,
+    EQUIPMENT_SOFTWARE_AND_OFFICE_HTML_TAG,
+    INFRASTRUCTURE_HTML_TAG,
+    OTHERS_HTML_TAG,
+    SALARY_HTML_TAG,
+)
+from products import _get_ogp_product_cost, _get_ogp_product_team_members
+from soup import HTML_PARSER, get_soup
+
+REPEAT = 5
+
+
+def _extract_two_parses(ogp_api_product_info_response: str) -> None:
+    """The previous extraction: one tree per extractor, one find per component"""
+    team_members_soup = BeautifulSoup(ogp_api_product_info_response, "html.parser")
+    _get_ogp_product_team_members(team_members_soup)
+    cost_soup = BeautifulSoup(ogp_api_product_info_response, "html.parser")
+    for cost_component in (
+        SALARY_HTML_TAG,
+        INFRASTRUCTURE_HTML_TAG,
+        CORPORATE_OVERHEAD_HTML_TAG,
+        EQUIPMENT_SOFTWARE_AND_OFFICE_HTML_TAG,
+        OTHERS_HTML_TAG,
+    ):
+        cost_soup.find("div", string=cost_component)
+
+
+def _extract_single_parse(ogp_api_product_info_response: str, features: str) -> None:
+    soup = get_soup(ogp_api_product_info_response, features)
+    _get_ogp_product_team_members(soup)
+    _get_ogp_product_cost(soup)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_fixture_arguments(parser)
+    args = parser.parse_args()
+
+    fixtures = get_product_info_fixtures(args.fixtures_dir, args.products, args.people)
+    if not fixtures:
+        print(f"No product pages found in {args.fixtures_dir}")
+        return
+
+    benchmarks = {
+        "two parses (html.parser)": lambda html: _extract_two_parses(html),
+        "single parse (html.parser)": lambda html: _extract_single_parse(
+            html, "html.parser"
+        ),
+    }
+    if HTML_PARSER != "html.parser":
+        benchmarks[f"single parse ({HTML_PARSER})"] = lambda html: (
+            _extract_single_parse(html, HTML_PARSER)
+        )
+
+    print(f"{len(fixtures)} product pages, best of {REPEAT}")
+    for name, extract in benchmarks.items():
+        seconds = min(
+            timeit.repeat(
+                lambda: [extract(html) for html in fixtures], number=1, repeat=REPEAT
+            )
+        )
+        print(f"{name}: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Least squares backends on a synthetic organisation where every person works
+on a handful of products. Needs scipy: poetry install --extras sparse
+
+Run from the repository root: python -m benchmarks.bench_solver
+"""
+
+import numpy as np
+from scipy import sparse
+
+from solver import (
+    DENSE_BACKEND,
+    LSMR_BACKEND,
+    LSQR_BACKEND,
+    NNLS_BACKEND,
+    solve_least_squares,
+)
+
+PRODUCTS_PER_PERSON = 3
+SEED = 0
+
+
+def get_synthetic_system(
+    people_count: int, product_count: int, seed: int = SEED
+) -> tuple[sparse.csr_matrix, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    columns = np.repeat(np.arange(people_count), PRODUCTS_PER_PERSON)
+    rows = rng.integers(0, product_count, size=columns.size)
+    involvement = rng.dirichlet(np.ones(PRODUCTS_PER_PERSON), size=people_count)
+    matrix = sparse.csr_matrix(
+        (involvement.ravel(), (rows, columns)), shape=(product_count, people_count)
+    )
+    quarterly_salaries = rng.uniform(20_000, 70_000, size=people_count)
+    return matrix, matrix @ quarterly_salaries
+
+
+def main() -> None:
+    for people_count, backends in (
+        (1_000, (DENSE_BACKEND, LSQR_BACKEND, LSMR_BACKEND, NNLS_BACKEND)),
+        (10_000, (LSQR_BACKEND, LSMR_BACKEND)),
+        (50_000, (LSMR_BACKEND,)),
+    ):
+        matrix, costs = get_synthetic_system(people_count, people_count // 4)
+        for backend in backends:
+            solution = solve_least_squares(matrix, costs, backend)
+            print(
+                f"{people_count} people, {backend}: {solution.seconds * 1000:.1f} ms, "
+                f"residual {solution.residual_norm:.3g}, rank {solution.rank}, "
+                f"iterations {solution.iterations}, converged {solution.converged}"
+            )
+
+
+if __name__ == "__main__":
+    main()
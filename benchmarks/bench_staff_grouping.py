@@ -0,0 +1,80 @@
+"""Grouping ProductStaff rows by staff id, comparing the single pass grouping,
+which should scale linearly with the number of rows, with the previous scan of
+every row for each staff id.
+
+Run from the repository root: python -m benchmarks.bench_staff_grouping
+"""
+
+import timeit
+
+from staff import Product, ProductStaff, _get_product_staff_by_staff_id
+
+ROWS_PER_STAFF = 3
+REPEAT = 5
+ROW_COUNTS = (1_000, 2_500, 5_000, 10_000, 25_000, 50_000)
+# The previous grouping is quadratic, so it is only timed on the smaller inputs
+MAX_SCAN_ROW_COUNT = 5_000
+
+
+def get_synthetic_product_staff(row_count: int) -> list[ProductStaff]:
+    staff_count = max(row_count // ROWS_PER_STAFF, 1)
+    return [
+        ProductStaff(
+            id=f"staff-{i % staff_count}",
+            name=f"Staff {i % staff_count}",
+            termination_date=None,
+            product=Product(
+                name=f"product-{i % 997}",
+                logo_url="",
+                role="Engineer",
+                involvement=1 / ROWS_PER_STAFF,
+                cost=100_000,
+            ),
+        )
+        for i in range(row_count)
+    ]
+
+
+def _get_product_staff_by_staff_id_scan(
+    all_products_staff: list[ProductStaff],
+) -> dict[str, list[ProductStaff]]:
+    """The previous grouping: collect the staff ids, then scan every row for
+    each of them"""
+    all_staff_ids: set[str] = set()
+    for product_staff in all_products_staff:
+        all_staff_ids.add(product_staff.id)
+    return {
+        staff_id: [
+            product_staff
+            for product_staff in all_products_staff
+            if product_staff.id == staff_id
+        ]
+        for staff_id in all_staff_ids
+    }
+
+
+def _get_best_seconds(grouping, all_products_staff: list[ProductStaff]) -> float:
+    return min(
+        timeit.repeat(lambda: grouping(all_products_staff), number=1, repeat=REPEAT)
+    )
+
+
+def main() -> None:
+    print(f"best of {REPEAT}, {ROWS_PER_STAFF} rows per staff")
+    for row_count in ROW_COUNTS:
+        all_products_staff = get_synthetic_product_staff(row_count)
+        seconds = _get_best_seconds(_get_product_staff_by_staff_id, all_products_staff)
+        line = (
+            f"{row_count} rows: single pass {seconds * 1000:.2f} ms "
+            f"({seconds / row_count * 1e9:.0f} ns per row)"
+        )
+        if row_count <= MAX_SCAN_ROW_COUNT:
+            scan_seconds = _get_best_seconds(
+                _get_product_staff_by_staff_id_scan, all_products_staff
+            )
+            line += f", scan per staff id {scan_seconds * 1000:.0f} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
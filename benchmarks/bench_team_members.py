@@ -0,0 +1,89 @@
+"""Team member extraction on a large synthetic team list, comparing the
+streaming single-parse extractor with the previous double call per anchor.
+
+Run from the repository root: python -m benchmarks.bench_team_members
+"""
+
+import timeit
+from typing import Optional
+from unicodedata import numeric
+
+from bs4 import Tag
+
+from models import OgpProductTeamMember
+from products import _get_ogp_product_team_members
+from soup import get_soup
+
+TEAM_SIZE = 5_000
+REPEAT = 5
+# The involvement fractions the site renders in each team member's title
+INVOLVEMENT_FRACTIONS = ("¼", "½", "¾", "1")
+
+
+def _get_synthetic_product_page(team_size: int) -> str:
+    team_member_tags = "".join(
+        f'<a href="/people/member-{i}">'
+        f'<img title="Member {i} ({INVOLVEMENT_FRACTIONS[i % 4]})" '
+        f'src="/images/{i}.jpg"></a>'
+        for i in range(team_size)
+    )
+    return (
+        "<html><body><div><h2>Team Members</h2></div>"
+        f"<div>{team_member_tags}<a href='/people'>All people</a></div>"
+        "</body></html>"
+    )
+
+
+def _get_ogp_product_team_member_before(
+    ogp_product_member_tag: Tag,
+) -> Optional[OgpProductTeamMember]:
+    """get_ogp_product_team_member as it was before the single-parse change"""
+    involvement_value = ogp_product_member_tag.find("img")
+    if involvement_value is None:
+        return None
+    involvement_text = involvement_value["title"]
+
+    involvement = numeric(
+        involvement_text[involvement_text.index("(") + 1 : involvement_text.index(")")]
+    )
+    default_name = involvement_text[0 : involvement_text.index("(") - 1]
+
+    return OgpProductTeamMember(
+        path=ogp_product_member_tag["href"],
+        involvement=involvement,
+        default_name=default_name,
+    )
+
+
+def _get_team_members_double_call(soup) -> list[OgpProductTeamMember]:
+    """The previous extraction, parsing and validating every anchor twice"""
+    team_members_data = (
+        soup.find("h2", string="Team Members")
+        .find_parent("div")
+        .find_next_sibling("div")
+        .find_all("a")
+    )
+    return [
+        _get_ogp_product_team_member_before(team_member_data)
+        for team_member_data in team_members_data
+        if _get_ogp_product_team_member_before(team_member_data) is not None
+    ]
+
+
+def main() -> None:
+    soup = get_soup(_get_synthetic_product_page(TEAM_SIZE))
+    benchmarks = {
+        "double call per anchor": _get_team_members_double_call,
+        "streaming, batch validation": _get_ogp_product_team_members,
+    }
+
+    assert _get_team_members_double_call(soup) == _get_ogp_product_team_members(soup)
+
+    print(f"{TEAM_SIZE} team members, best of {REPEAT}")
+    for name, extract in benchmarks.items():
+        seconds = min(timeit.repeat(lambda: extract(soup), number=1, repeat=REPEAT))
+        print(f"{name}: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
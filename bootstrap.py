@@ -0,0 +1,109 @@
+"""
+Bootstrap confidence intervals for the least squares salary estimates.
+
+Each replicate resamples products with replacement, optionally perturbs every
+non-zero involvement by multiplicative log-normal noise, and re-solves the
+weighted system. Replicates are solved in batches with a stacked np.linalg.pinv,
+and batches can be spread across a process pool. Every batch draws from its own
+child of one SeedSequence, so results depend only on the seed and batch size,
+not on the number of workers.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from contribution import (
+    _get_current_product_contribution_matrix,
+    _get_quarterly_team_members_cost_with_least_squares_method,
+    _get_yearly_salary,
+    _iter_contributions,
+)
+
+DEFAULT_REPLICATES = 1000
+DEFAULT_BATCH_SIZE = 100
+
+
+@dataclass
+class SalaryInterval:
+    yearly_salary: float
+    lower: float
+    upper: float
+
+
+def _solve_replicates(
+    matrix: np.ndarray,
+    costs: np.ndarray,
+    seed_sequence: np.random.SeedSequence,
+    replicate_count: int,
+    involvement_noise: float,
+) -> np.ndarray:
+    """Returns a (replicate_count, team member count) array of quarterly costs.
+    Team members whose products were all left out of a replicate are NaN"""
+    rng = np.random.default_rng(seed_sequence)
+    product_count = matrix.shape[0]
+    row_weights = rng.multinomial(
+        product_count, np.full(product_count, 1 / product_count), size=replicate_count
+    ).astype(np.float64)
+
+    matrices = np.broadcast_to(matrix, (replicate_count, *matrix.shape))
+    if involvement_noise > 0:
+        matrices = matrices * rng.lognormal(0, involvement_noise, size=matrices.shape)
+    row_scales = np.sqrt(row_weights)
+    weighted_matrices = matrices * row_scales[:, :, None]
+    weighted_costs = costs * row_scales
+
+    quarterly_costs = np.einsum(
+        "rnm,rm->rn", np.linalg.pinv(weighted_matrices), weighted_costs
+    )
+    is_identified = np.einsum("rm,rmn->rn", row_weights, np.abs(matrices)) > 0
+    return np.where(is_identified, quarterly_costs, np.nan)
+
+
+def get_team_members_yearly_salary_intervals(
+    use_api: bool = False,
+    replicates: int = DEFAULT_REPLICATES,
+    confidence: float = 0.95,
+    involvement_noise: float = 0.0,
+    seed: int = 0,
+    max_workers: Optional[int] = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> dict[str, SalaryInterval]:
+    """Point estimates with percentile bootstrap intervals, keyed by name.
+    max_workers=None uses one process per core"""
+    product_contribution_matrix = _get_current_product_contribution_matrix(
+        _iter_contributions(use_api), use_sparse=False
+    )
+    matrix = product_contribution_matrix.matrix
+    costs = product_contribution_matrix.quarterly_product_costs
+
+    batch_sizes = [
+        min(batch_size, replicates - start)
+        for start in range(0, replicates, batch_size)
+    ]
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+    batch_args = [
+        (matrix, costs, seed_sequence, replicate_count, involvement_noise)
+        for seed_sequence, replicate_count in zip(seed_sequences, batch_sizes)
+    ]
+    if max_workers == 1:
+        batches = [_solve_replicates(*args) for args in batch_args]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            batches = list(executor.map(_solve_replicates, *zip(*batch_args)))
+
+    tail = (1 - confidence) / 2 * 100
+    lower, upper = np.nanpercentile(np.vstack(batches), [tail, 100 - tail], axis=0)
+    team_members_quarterly_salary = (
+        _get_quarterly_team_members_cost_with_least_squares_method(matrix, costs)
+    )
+    return {
+        name: SalaryInterval(
+            yearly_salary=_get_yearly_salary(float(team_members_quarterly_salary[i])),
+            lower=_get_yearly_salary(float(lower[i])),
+            upper=_get_yearly_salary(float(upper[i])),
+        )
+        for i, name in enumerate(product_contribution_matrix.team_member_names)
+    }
@@ -0,0 +1,117 @@
+"""
+Command line entry point: python cli.py {crawl,solve,render-markdown,serve}
+
+Each subcommand imports only the modules it needs, so an offline solve starts
+without loading the HTTP, HTML parsing, pydantic or FastAPI stacks.
+"""
+
+import argparse
+from typing import Optional
+
+DEFAULT_CONTRIBUTIONS_PATH = "data.json"
+DEFAULT_OUTPUT_PATH = "data.csv"
+
+
+def _crawl(args: argparse.Namespace) -> None:
+    from crawl import iter_api_contributions, save_contributions
+    from metrics import CRAWL_STAGE, timed_iter
+
+    count = save_contributions(
+        timed_iter(
+            CRAWL_STAGE,
+            iter_api_contributions(
+                args.max_workers,
+                args.parse_workers,
+                args.parse_batch_size,
+                args.allow_partial,
+            ),
+        ),
+        args.output,
+    )
+    print(f"Wrote {count} contributions to {args.output}")
+
+
+def _solve(args: argparse.Namespace) -> None:
+    from contribution import get_output, save_output
+
+    output = get_output()
+    save_output(output, args.output)
+    print(f"Wrote {len(output)} salary estimates to {args.output}")
+
+
+def _render_markdown(args: argparse.Namespace) -> None:
+    from contribution import get_output
+    from generate_markdown import get_salary_markdown
+
+    print(
+        get_salary_markdown(
+            (i.name, i.title, float(i.yearly_salary)) for i in get_output()
+        )
+    )
+
+
+def _serve(args: argparse.Namespace) -> None:
+    import uvicorn
+
+    uvicorn.run("main:app", host=args.host, port=args.port)
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    from concurrency import DEFAULT_MAX_WORKERS
+
+    parser = argparse.ArgumentParser(prog="cli.py")
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="print time spent per stage and request/parse counters afterwards",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    crawl_parser = subparsers.add_parser(
+        "crawl", help=f"crawl the live site into {DEFAULT_CONTRIBUTIONS_PATH}"
+    )
+    crawl_parser.add_argument("--output", default=DEFAULT_CONTRIBUTIONS_PATH)
+    crawl_parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS)
+    crawl_parser.add_argument(
+        "--parse-workers",
+        type=int,
+        help="parse pages in a process pool with this many workers",
+    )
+    crawl_parser.add_argument("--parse-batch-size", type=int)
+    crawl_parser.add_argument(
+        "--allow-partial",
+        action="store_true",
+        help="write the contributions even if some product pages failed",
+    )
+    crawl_parser.set_defaults(handler=_crawl)
+
+    solve_parser = subparsers.add_parser(
+        "solve",
+        help=f"estimate salaries from {DEFAULT_CONTRIBUTIONS_PATH} into a CSV",
+    )
+    solve_parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH)
+    solve_parser.set_defaults(handler=_solve)
+
+    render_markdown_parser = subparsers.add_parser(
+        "render-markdown", help="print the salary estimates as a markdown table"
+    )
+    render_markdown_parser.set_defaults(handler=_render_markdown)
+
+    serve_parser = subparsers.add_parser("serve", help="run the API server")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.set_defaults(handler=_serve)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = _get_parser().parse_args(argv)
+    args.handler(args)
+    if args.timings:
+        from metrics import get_stage_breakdown
+
+        print(get_stage_breakdown())
+
+
+if __name__ == "__main__":
+    main()
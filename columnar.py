@@ -0,0 +1,168 @@
+"""
+Columnar contributions snapshot: a directory of .npy arrays that can be
+memory-mapped. Product and team member strings are dictionary-encoded, so
+every contribution row is just two integer codes and a float.
+
+Convert the existing data.json with: python columnar.py data.json data.columns
+The SHA-256 of the source file is stored alongside the arrays, so a snapshot
+converted from an older data.json can be recognised as stale and ignored.
+"""
+
+import hashlib
+import json
+import sys
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import numpy as np
+
+DEFAULT_COLUMNAR_SNAPSHOT_PATH = "data.columns"
+SOURCE_HASH_FILENAME = "source.sha256"
+
+
+@dataclass
+class ContributionColumns:
+    # One entry per contribution row
+    product_codes: np.ndarray
+    team_member_codes: np.ndarray
+    team_member_contributions: np.ndarray
+    # One entry per product, in order of first appearance
+    product_names: np.ndarray
+    product_salary_costs: np.ndarray
+    # One entry per team member, in order of first appearance
+    team_member_names: np.ndarray
+    team_member_titles: np.ndarray
+
+
+def get_contribution_columns(rows: list[dict[str, Any]]) -> ContributionColumns:
+    """Dictionary-encodes contribution rows shaped like the entries of data.json.
+    A product keeps its first salary cost and a team member their last title"""
+    product_indices: dict[str, int] = {}
+    team_member_indices: dict[str, int] = {}
+    product_salary_costs: list[float] = []
+    team_member_titles: list[str] = []
+    product_codes = np.empty(len(rows), dtype=np.int32)
+    team_member_codes = np.empty(len(rows), dtype=np.int32)
+    team_member_contributions = np.empty(len(rows), dtype=np.float64)
+
+    for i, row in enumerate(rows):
+        product_code = product_indices.setdefault(
+            row["product_name"], len(product_indices)
+        )
+        if product_code == len(product_salary_costs):
+            product_salary_costs.append(row["product_salary_cost"])
+        team_member_code = team_member_indices.setdefault(
+            row["team_member_name"], len(team_member_indices)
+        )
+        if team_member_code == len(team_member_titles):
+            team_member_titles.append(row["team_member_title"])
+        team_member_titles[team_member_code] = row["team_member_title"]
+
+        product_codes[i] = product_code
+        team_member_codes[i] = team_member_code
+        team_member_contributions[i] = row["team_member_contribution"]
+
+    return ContributionColumns(
+        product_codes=product_codes,
+        team_member_codes=team_member_codes,
+        team_member_contributions=team_member_contributions,
+        product_names=np.array(list(product_indices), dtype=str),
+        product_salary_costs=np.array(product_salary_costs, dtype=np.float64),
+        team_member_names=np.array(list(team_member_indices), dtype=str),
+        team_member_titles=np.array(team_member_titles, dtype=str),
+    )
+
+
+def get_source_hash(json_path: Union[str, Path]) -> str:
+    with open(json_path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def save_contribution_columns(
+    columns: ContributionColumns,
+    path: Union[str, Path],
+    source_hash: Optional[str] = None,
+) -> None:
+    """Writes one .npy file per column, and source_hash when the columns were
+    converted from a file"""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for field in fields(ContributionColumns):
+        np.save(path / f"{field.name}.npy", getattr(columns, field.name))
+    source_hash_path = path / SOURCE_HASH_FILENAME
+    if source_hash is not None:
+        source_hash_path.write_text(source_hash)
+    elif source_hash_path.exists():
+        source_hash_path.unlink()
+
+
+def is_current_contribution_columns(
+    path: Union[str, Path], json_path: Union[str, Path]
+) -> bool:
+    """Whether the snapshot at path was converted from json_path as it is now.
+    Snapshots without a recorded source hash are never current"""
+    try:
+        source_hash = (Path(path) / SOURCE_HASH_FILENAME).read_text().strip()
+    except OSError:
+        return False
+    return source_hash == get_source_hash(json_path)
+
+
+def load_contribution_columns(
+    path: Union[str, Path], mmap_mode: Optional[str] = "r"
+) -> ContributionColumns:
+    path = Path(path)
+    return ContributionColumns(
+        **{
+            field.name: np.load(path / f"{field.name}.npy", mmap_mode=mmap_mode)
+            for field in fields(ContributionColumns)
+        }
+    )
+
+
+def get_contribution_matrix_arrays(
+    columns: ContributionColumns, use_sparse: bool = False
+) -> Any:
+    """
+    Builds the product x team member contribution matrix straight from the
+    columns. A repeated (product, team member) pair keeps its last contribution
+    """
+    shape = (len(columns.product_names), len(columns.team_member_names))
+    keys = columns.product_codes.astype(np.int64) * shape[1] + columns.team_member_codes
+    _, last_reversed_indices = np.unique(keys[::-1], return_index=True)
+    last_indices = len(keys) - 1 - last_reversed_indices
+    rows = columns.product_codes[last_indices]
+    team_member_columns = columns.team_member_codes[last_indices]
+    values = columns.team_member_contributions[last_indices]
+
+    if use_sparse:
+        from scipy import sparse
+
+        return sparse.csr_matrix((values, (rows, team_member_columns)), shape=shape)
+    matrix = np.zeros(shape)
+    matrix[rows, team_member_columns] = values
+    return matrix
+
+
+def convert_json_to_columns(
+    json_path: Union[str, Path], columnar_path: Union[str, Path]
+) -> ContributionColumns:
+    with open(json_path, "rb") as file:
+        source = file.read()
+    columns = get_contribution_columns(json.loads(source))
+    save_contribution_columns(
+        columns, columnar_path, hashlib.sha256(source).hexdigest()
+    )
+    return columns
+
+
+if __name__ == "__main__":
+    json_path = sys.argv[1] if len(sys.argv) > 1 else "data.json"
+    columnar_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_COLUMNAR_SNAPSHOT_PATH
+    columns = convert_json_to_columns(json_path, columnar_path)
+    print(
+        f"Wrote {len(columns.product_codes)} contributions, "
+        f"{len(columns.product_names)} products and "
+        f"{len(columns.team_member_names)} team members to {columnar_path}"
+    )
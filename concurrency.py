@@ -0,0 +1,54 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, TypeVar, Union
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_MAX_WORKERS = 8
+# Items submitted ahead of the consumer, per worker
+PREFETCH_PER_WORKER = 2
+
+
+def imap_concurrently(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Iterator[Union[R, Exception]]:
+    """Applies fn to every item in a thread pool, yielding results in input
+    order as soon as each is ready. items is consumed lazily, and at most
+    max_workers * PREFETCH_PER_WORKER items are running or waiting to be
+    yielded, so a slow consumer holds back submission instead of letting
+    results pile up. A failing item yields its exception in place of a result
+    instead of aborting the batch"""
+
+    def _call(item: T) -> Union[R, Exception]:
+        try:
+            return fn(item)
+        except Exception as e:
+            return e
+
+    if max_workers <= 1:
+        yield from (_call(item) for item in items)
+        return
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = deque(
+            executor.submit(_call, item)
+            for item in islice(items, max_workers * PREFETCH_PER_WORKER)
+        )
+        while futures:
+            result = futures.popleft().result()
+            for item in islice(items, 1):
+                futures.append(executor.submit(_call, item))
+            yield result
+
+
+def map_concurrently(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> list[Union[R, Exception]]:
+    """Eager version of imap_concurrently"""
+    return list(imap_concurrently(fn, items, max_workers))
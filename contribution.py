@@ -1,20 +1,48 @@
+import argparse
 import csv
 import json
+import logging
+import os
 from dataclasses import asdict, dataclass
-from typing import Union
+from typing import Any, Iterable, Iterator, Optional
 
 import numpy as np
 
-from models import OgpProduct
-from products import get_ogp_products
-from team_member import get_team_member_info
-
+from columnar import (
+    DEFAULT_COLUMNAR_SNAPSHOT_PATH,
+    ContributionColumns,
+    get_contribution_matrix_arrays,
+    is_current_contribution_columns,
+    load_contribution_columns,
+)
+from concurrency import DEFAULT_MAX_WORKERS
+from metrics import (
+    CRAWL_STAGE,
+    LOAD_STAGE,
+    MATRIX_BUILD_STAGE,
+    get_stage_breakdown,
+    timed,
+    timed_iter,
+)
+from solver import DENSE_BACKEND, HAS_SCIPY, is_large_system, solve_least_squares
+
+CONTRIBUTIONS_PATH = "data.json"
 MONTHS_IN_YEAR = 12
 MONTHS_IN_QUARTER = 3
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class Contribution:
+    __slots__ = (
+        "product_name",
+        "team_member_name",
+        "team_member_contribution",
+        "team_member_title",
+        "product_salary_cost",
+    )
+
     product_name: str
     team_member_name: str
     team_member_contribution: float
@@ -30,108 +58,416 @@ def _get_yearly_salary(
     return quarterly_salary / months_in_quarter * months_in_year
 
 
-def _get_contribution_by_product(ogp_product: OgpProduct) -> list[Contribution]:
-    contribution: list[Contribution] = []
+def _iter_contributions(
+    use_api: bool,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    parse_workers: Optional[int] = None,
+    parse_batch_size: Optional[int] = None,
+) -> Iterator[Contribution]:
+    """Streams contributions product by product, from data.json or, over the
+    API, as the crawl progresses. The crawling modules are only imported for
+    the API, so offline runs start without them"""
+    if not use_api:
+        with open(CONTRIBUTIONS_PATH) as file:
+            loaded_file = json.load(file)
+        for i in loaded_file:
+            yield Contribution(**i)
+        return
+
+    from crawl import iter_api_contributions
+
+    yield from iter_api_contributions(max_workers, parse_workers, parse_batch_size)
 
-    for team_member in ogp_product.team_members:
-        team_member_info = get_team_member_info(
-            team_member.path, team_member.default_name
-        )
-        contribution.append(
-            Contribution(
-                product_name=ogp_product.name,
-                team_member_name=team_member_info.name,
-                team_member_contribution=team_member.involvement,
-                team_member_title=team_member_info.title,
-                product_salary_cost=ogp_product.cost.salary,
-            )
-        )
 
-    return contribution
+def _get_contributions_stage(use_api: bool) -> str:
+    return CRAWL_STAGE if use_api else LOAD_STAGE
 
 
 def _get_all_contributions(use_api: bool) -> list[Contribution]:
-    if use_api:
-        ogp_products = get_ogp_products()
+    return list(
+        timed_iter(_get_contributions_stage(use_api), _iter_contributions(use_api))
+    )
 
-        contributions: list[Contribution] = []
-        for ogp_product in ogp_products:
-            contribution = _get_contribution_by_product(ogp_product)
-            contributions = [*contributions, *contribution]
-        return contributions
 
-    with open("data.json") as file:
-        loaded_file = json.load(file)
-        return [Contribution(**i) for i in loaded_file]
+@dataclass
+class ContributionMatrix:
+    """
+    Each row represents a product, labelled by product_names
+    Each column represents a team member, labelled by team_member_names
+    Each element represents the contribution of a team member to a given product
+    """
 
+    matrix: Any  # np.ndarray, or a scipy.sparse CSR matrix
+    product_names: np.ndarray
+    team_member_names: np.ndarray
+    quarterly_product_costs: np.ndarray  # Aligned with product_names
 
-def _get_quarterly_product_costs(contributions: list[Contribution]) -> list[float]:
+
+@timed(MATRIX_BUILD_STAGE)
+def _get_current_product_contribution_matrix(
+    contributions: Iterable[Contribution], use_sparse: Optional[bool] = None
+) -> ContributionMatrix:
+    """Indexes products and team members by first appearance in a single pass,
+    so contributions may be a stream. A repeated (product, team member) pair
+    keeps its last contribution; a product keeps its first salary cost.
+    Without an explicit use_sparse, large matrices are stored sparsely"""
+    if use_sparse and not HAS_SCIPY:
+        raise ImportError("scipy is required for a sparse contribution matrix")
+
+    product_indices: dict[str, int] = {}
+    team_member_indices: dict[str, int] = {}
     quarterly_product_costs: list[float] = []
+    entries: dict[tuple[int, int], float] = {}
+    for contribution in contributions:
+        row = product_indices.setdefault(
+            contribution.product_name, len(product_indices)
+        )
+        if row == len(quarterly_product_costs):
+            quarterly_product_costs.append(contribution.product_salary_cost)
+        column = team_member_indices.setdefault(
+            contribution.team_member_name, len(team_member_indices)
+        )
+        entries[row, column] = contribution.team_member_contribution
+
+    shape = (len(product_indices), len(team_member_indices))
+    if use_sparse is None:
+        use_sparse = is_large_system(shape)
+    rows = np.fromiter((row for row, _ in entries), dtype=np.intp, count=len(entries))
+    columns = np.fromiter(
+        (column for _, column in entries), dtype=np.intp, count=len(entries)
+    )
+    values = np.fromiter(entries.values(), dtype=np.float64, count=len(entries))
 
-    seen_products = set()
+    if use_sparse:
+        from scipy import sparse
 
-    for contribution in contributions:
-        if contribution.product_name in seen_products:
-            continue
-        quarterly_product_costs.append(contribution.product_salary_cost)
-        seen_products.add(contribution.product_name)
-    return quarterly_product_costs
+        matrix = sparse.csr_matrix((values, (rows, columns)), shape=shape)
+    else:
+        matrix = np.zeros(shape)
+        matrix[rows, columns] = values
 
+    return ContributionMatrix(
+        matrix=matrix,
+        product_names=np.array(list(product_indices), dtype=object),
+        team_member_names=np.array(list(team_member_indices), dtype=object),
+        quarterly_product_costs=np.array(quarterly_product_costs, dtype=np.float64),
+    )
 
-def _get_current_product_contribution_matrix(
-    contributions: list[Contribution],
-) -> list[list[float]]:
-    matrix: list[list[float]] = []
-    product_names = list(dict.fromkeys([i.product_name for i in contributions]))
-    team_members = list(dict.fromkeys([i.team_member_name for i in contributions]))
-
-    for product_name in product_names:
-        row = []
-        contributions_by_product = {
-            contribution.team_member_name: contribution.team_member_contribution
-            for contribution in contributions
-            if contribution.product_name == product_name
-        }
-        for team_member in team_members:
-            row.append(contributions_by_product.get(team_member, 0))
-        matrix.append(row)
 
-    return matrix
+@timed(MATRIX_BUILD_STAGE)
+def _get_contribution_matrix_from_columns(
+    columns: ContributionColumns, use_sparse: Optional[bool] = None
+) -> ContributionMatrix:
+    """Same matrix as _get_current_product_contribution_matrix, built without
+    any per-row objects"""
+    shape = (len(columns.product_names), len(columns.team_member_names))
+    if use_sparse is None:
+        use_sparse = is_large_system(shape)
+    if use_sparse and not HAS_SCIPY:
+        raise ImportError("scipy is required for a sparse contribution matrix")
+
+    return ContributionMatrix(
+        matrix=get_contribution_matrix_arrays(columns, use_sparse),
+        product_names=columns.product_names.astype(object),
+        team_member_names=columns.team_member_names.astype(object),
+        quarterly_product_costs=np.asarray(columns.product_salary_costs),
+    )
 
 
 def _get_quarterly_team_members_cost_with_least_squares_method(
-    product_contribution_matrix: list[list[Union[int, float]]],
+    product_contribution_matrix: Any,
     quarterly_product_costs: list[float],
+    solver_backend: Optional[str] = None,
 ):
-    quarterly_team_members_cost, _, _, _ = np.linalg.lstsq(
-        np.array(product_contribution_matrix),
-        np.array(quarterly_product_costs),
-        rcond=None,
-    )
-    return quarterly_team_members_cost
-
+    return solve_least_squares(
+        product_contribution_matrix, quarterly_product_costs, solver_backend
+    ).x
+
+
+def _load_current_contribution_columns(
+    columnar_snapshot_path: str,
+) -> Optional[ContributionColumns]:
+    """The columnar snapshot, or None when there is none or it was converted from
+    a different data.json than the current one"""
+    if not os.path.isdir(columnar_snapshot_path):
+        return None
+    with timed(LOAD_STAGE):
+        if not is_current_contribution_columns(
+            columnar_snapshot_path, CONTRIBUTIONS_PATH
+        ):
+            logger.warning(
+                "Ignoring %s: it was not converted from the current %s",
+                columnar_snapshot_path,
+                CONTRIBUTIONS_PATH,
+            )
+            return None
+        return load_contribution_columns(columnar_snapshot_path)
 
-def get_team_members_yearly_salary(use_api: bool = False) -> dict[str, float]:
-    contributions = _get_all_contributions(use_api)
-
-    product_contribution_matrix = _get_current_product_contribution_matrix(
-        contributions
-    )
-    quarterly_product_costs = _get_quarterly_product_costs(contributions)
 
+def _get_team_members_yearly_salary_from_matrix(
+    product_contribution_matrix: ContributionMatrix,
+    solver_backend: Optional[str] = None,
+) -> dict[str, float]:
     team_members_quarterly_salary = (
         _get_quarterly_team_members_cost_with_least_squares_method(
-            product_contribution_matrix, quarterly_product_costs
+            product_contribution_matrix.matrix,
+            product_contribution_matrix.quarterly_product_costs,
+            solver_backend,
         )
     )
     team_members_yearly_salary = [
         _get_yearly_salary(team_member_quarterly_salary)
         for team_member_quarterly_salary in team_members_quarterly_salary
     ]
-    team_members_names = list(
-        dict.fromkeys([contribution.team_member_name for contribution in contributions])
+    return dict(
+        zip(product_contribution_matrix.team_member_names, team_members_yearly_salary)
     )
-    return dict(zip(team_members_names, team_members_yearly_salary))
+
+
+def get_team_members_yearly_salary(
+    use_api: bool = False,
+    solver_backend: Optional[str] = None,
+    columnar_snapshot_path: str = DEFAULT_COLUMNAR_SNAPSHOT_PATH,
+) -> dict[str, float]:
+    """Offline estimates come from the columnar snapshot when it was converted
+    from the current data.json, and from data.json otherwise"""
+    columns = (
+        _load_current_contribution_columns(columnar_snapshot_path)
+        if not use_api
+        else None
+    )
+    if columns is not None:
+        product_contribution_matrix = _get_contribution_matrix_from_columns(columns)
+    else:
+        product_contribution_matrix = _get_current_product_contribution_matrix(
+            timed_iter(_get_contributions_stage(use_api), _iter_contributions(use_api))
+        )
+    return _get_team_members_yearly_salary_from_matrix(
+        product_contribution_matrix, solver_backend
+    )
+
+
+@dataclass(frozen=True)
+class _ProductSnapshot:
+    salary_cost: float
+    team_member_contributions: tuple[tuple[str, float], ...]
+
+
+def _get_product_snapshots(
+    contributions: list[Contribution],
+) -> dict[str, _ProductSnapshot]:
+    salary_costs: dict[str, float] = {}
+    team_member_contributions: dict[str, dict[str, float]] = {}
+    for contribution in contributions:
+        salary_costs.setdefault(
+            contribution.product_name, contribution.product_salary_cost
+        )
+        team_member_contributions.setdefault(contribution.product_name, {})[
+            contribution.team_member_name
+        ] = contribution.team_member_contribution
+
+    return {
+        product_name: _ProductSnapshot(
+            salary_cost=salary_cost,
+            team_member_contributions=tuple(
+                sorted(team_member_contributions[product_name].items())
+            ),
+        )
+        for product_name, salary_cost in salary_costs.items()
+    }
+
+
+def _get_changed_products(
+    previous_snapshots: dict[str, _ProductSnapshot],
+    current_snapshots: dict[str, _ProductSnapshot],
+) -> set[str]:
+    """Products that were added, removed, or whose cost or team changed"""
+    return {
+        product_name
+        for product_name in previous_snapshots.keys() | current_snapshots.keys()
+        if previous_snapshots.get(product_name) != current_snapshots.get(product_name)
+    }
+
+
+class IncrementalSalaryEstimator:
+    """
+    Re-estimates yearly salaries as contributions change between crawls.
+
+    It keeps the contribution matrix A (products x team members) and a full QR
+    factorization of A, or of A.T when there are fewer products than team
+    members. A changed product's row is deleted and re-appended, and team
+    members who come or go add or delete a column, each with a scipy.linalg
+    qr_insert / qr_delete update instead of a new factorization. The solve is
+    then a triangular solve on R, giving the minimum-norm least squares
+    solution that the full solve in get_team_members_yearly_salary gives.
+
+    A is refactorized from scratch when the orientation flips or every row or
+    column is replaced. If R is rank deficient, the update falls back to the
+    full dense solve of A. Requires scipy
+    """
+
+    def __init__(self) -> None:
+        if not HAS_SCIPY:
+            raise ImportError("scipy is required for IncrementalSalaryEstimator")
+        self.changed_products: set[str] = set()
+        self._snapshots: dict[str, _ProductSnapshot] = {}
+        self._product_names: list[str] = []
+        self._team_member_names: list[str] = []
+        self._matrix = np.zeros((0, 0))
+        self._costs = np.zeros(0)
+        self._is_tall = True  # Whether _q and _r factorize A rather than A.T
+        self._q: Optional[np.ndarray] = None
+        self._r: Optional[np.ndarray] = None
+        self._team_members_yearly_salary: dict[str, float] = {}
+
+    def _get_which(self, axis: int) -> str:
+        """The side of the factorized matrix that axis of A lies on"""
+        return "row" if (axis == 0) == self._is_tall else "col"
+
+    def _delete(self, index: int, axis: int) -> None:
+        """Deletes a product row (axis 0) or team member column (axis 1) of A"""
+        from scipy.linalg import qr_delete
+
+        self._q, self._r = qr_delete(
+            self._q, self._r, index, which=self._get_which(axis)
+        )
+        self._matrix = np.delete(self._matrix, index, axis)
+
+    def _append(self, values: np.ndarray, axis: int) -> None:
+        """Appends a product row (axis 0) or team member column (axis 1) to A"""
+        from scipy.linalg import qr_insert
+
+        index = self._matrix.shape[axis]
+        self._q, self._r = qr_insert(
+            self._q, self._r, values, index, which=self._get_which(axis)
+        )
+        self._matrix = np.insert(self._matrix, index, values, axis)
+
+    def _get_rows(self, product_names: list[str]) -> np.ndarray:
+        """Rows of A for product_names over the current team member columns"""
+        team_member_columns = {
+            team_member_name: column
+            for column, team_member_name in enumerate(self._team_member_names)
+        }
+        rows = np.zeros((len(product_names), len(self._team_member_names)))
+        for row, product_name in enumerate(product_names):
+            for team_member_name, contribution in self._snapshots[
+                product_name
+            ].team_member_contributions:
+                rows[row, team_member_columns[team_member_name]] = contribution
+        return rows
+
+    def _factorize(self) -> None:
+        from scipy.linalg import qr
+
+        self._is_tall = self._matrix.shape[0] >= self._matrix.shape[1]
+        self._q, self._r = qr(self._matrix if self._is_tall else self._matrix.T)
+
+    def _solve(self) -> np.ndarray:
+        """Minimum-norm least squares solution of A @ x = costs from the QR
+        factorization"""
+        from scipy.linalg import solve_triangular
+
+        assert self._q is not None and self._r is not None
+        size = min(self._matrix.shape)
+        r = self._r[:size, :size]
+        diagonal = np.abs(np.diag(r))
+        tolerance = max(self._matrix.shape) * np.finfo(np.float64).eps
+        if diagonal.min() <= tolerance * diagonal.max():
+            return solve_least_squares(self._matrix, self._costs, DENSE_BACKEND).x
+        if self._is_tall:
+            return solve_triangular(r, (self._q.T @ self._costs)[:size])
+        return self._q[:, :size] @ solve_triangular(r, self._costs, trans="T")
+
+    def update(self, contributions: list[Contribution]) -> dict[str, float]:
+        """Yearly salaries for the team members in contributions, updating the
+        factorization only for the products and team members that changed"""
+        snapshots = _get_product_snapshots(contributions)
+        self.changed_products = _get_changed_products(self._snapshots, snapshots)
+        if not self.changed_products:
+            return dict(self._team_members_yearly_salary)
+        self._snapshots = snapshots
+
+        current_team_members = {
+            team_member_name
+            for snapshot in snapshots.values()
+            for team_member_name, _ in snapshot.team_member_contributions
+        }
+        removed_rows = [
+            row
+            for row, product_name in enumerate(self._product_names)
+            if product_name in self.changed_products
+        ]
+        removed_columns = [
+            column
+            for column, team_member_name in enumerate(self._team_member_names)
+            if team_member_name not in current_team_members
+        ]
+        added_products = [
+            product_name
+            for product_name in snapshots
+            if product_name in self.changed_products
+        ]
+        added_team_members = sorted(
+            current_team_members.difference(self._team_member_names)
+        )
+
+        shape = (
+            len(self._product_names) - len(removed_rows) + len(added_products),
+            len(self._team_member_names)
+            - len(removed_columns)
+            + len(added_team_members),
+        )
+        if (
+            self._q is None
+            or (shape[0] >= shape[1]) != self._is_tall
+            or len(removed_rows) == len(self._product_names)
+            or len(removed_columns) == len(self._team_member_names)
+        ):
+            self._product_names = list(snapshots)
+            self._team_member_names = sorted(current_team_members)
+            self._matrix = self._get_rows(self._product_names)
+            self._costs = np.array(
+                [snapshot.salary_cost for snapshot in snapshots.values()]
+            )
+            self._q = self._r = None
+            if 0 not in self._matrix.shape:
+                self._factorize()
+        else:
+            for row in reversed(removed_rows):
+                self._delete(row, axis=0)
+                del self._product_names[row]
+            self._costs = np.delete(self._costs, removed_rows)
+            for column in reversed(removed_columns):
+                self._delete(column, axis=1)
+                del self._team_member_names[column]
+
+            for team_member_name in added_team_members:
+                self._append(np.zeros(len(self._product_names)), axis=1)
+                self._team_member_names.append(team_member_name)
+            for product_name, row in zip(
+                added_products, self._get_rows(added_products)
+            ):
+                self._append(row, axis=0)
+                self._product_names.append(product_name)
+            self._costs = np.append(
+                self._costs,
+                [
+                    snapshots[product_name].salary_cost
+                    for product_name in added_products
+                ],
+            )
+
+        if self._q is None:
+            self._team_members_yearly_salary = {}
+            return {}
+
+        team_members_quarterly_salary = self._solve()
+        self._team_members_yearly_salary = {
+            team_member_name: _get_yearly_salary(team_members_quarterly_salary[column])
+            for column, team_member_name in enumerate(self._team_member_names)
+        }
+        return dict(self._team_members_yearly_salary)
 
 
 @dataclass
@@ -154,38 +490,95 @@ def get_full_contribution_team_members(contributions: list[Contribution]):
     return [k for k, v in team_members_total_contributions.items() if v > 0.98]
 
 
-def test() -> list[Output]:
-    output: list[Output] = []
+def _get_full_contribution_team_members_from_columns(
+    columns: ContributionColumns,
+) -> set[str]:
+    team_members_total_contributions = np.bincount(
+        columns.team_member_codes,
+        weights=columns.team_member_contributions,
+        minlength=len(columns.team_member_names),
+    )
+    return set(
+        columns.team_member_names[team_members_total_contributions > 0.98].tolist()
+    )
 
-    contributions = _get_all_contributions(False)
-    full_contribution_team_members = get_full_contribution_team_members(contributions)
 
-    team_member_by_contributions = {i.team_member_name: i for i in contributions}
+def get_output(
+    columnar_snapshot_path: str = DEFAULT_COLUMNAR_SNAPSHOT_PATH,
+) -> list[Output]:
+    """Offline yearly salary estimates, highest first. Salaries, titles and full
+    contributions all come from the same source: the columnar snapshot when it
+    is current, and data.json otherwise"""
+    output: list[Output] = []
+
+    columns = _load_current_contribution_columns(columnar_snapshot_path)
+    if columns is not None:
+        team_members_yearly_salary = _get_team_members_yearly_salary_from_matrix(
+            _get_contribution_matrix_from_columns(columns)
+        )
+        team_member_titles = dict(
+            zip(
+                columns.team_member_names.tolist(),
+                columns.team_member_titles.tolist(),
+            )
+        )
+        full_contribution_team_members = (
+            _get_full_contribution_team_members_from_columns(columns)
+        )
+    else:
+        contributions = _get_all_contributions(False)
+        team_members_yearly_salary = _get_team_members_yearly_salary_from_matrix(
+            _get_current_product_contribution_matrix(contributions)
+        )
+        # A team member keeps their last title, as in the columnar snapshot
+        team_member_titles = {
+            i.team_member_name: i.team_member_title for i in contributions
+        }
+        full_contribution_team_members = set(
+            get_full_contribution_team_members(contributions)
+        )
 
-    team_members_yearly_salary = get_team_members_yearly_salary()
     for name, salary in team_members_yearly_salary.items():
         output.append(
             Output(
                 name=name,
                 yearly_salary=f"{salary:.2f}",
-                title=team_member_by_contributions[name].team_member_title,
+                title=team_member_titles[name],
                 has_full_contribution=name in full_contribution_team_members,
             )
         )
-    sorted_output = sorted(output, key=lambda x: float(x.yearly_salary), reverse=True)
+    return sorted(output, key=lambda x: float(x.yearly_salary), reverse=True)
+
+
+def test() -> list[Output]:
+    sorted_output = get_output()
     print(sorted_output)
     return sorted_output
 
 
-def main():
-    # get_team_members_yearly_salary()
-    # print(get_team_members_yearly_salary())
-    output = test()
+def save_output(output: list[Output], path: str = "data.csv") -> None:
     output_dict = [asdict(i) for i in output]
-    with open("data.csv", "w") as f:
+    with open(path, "w") as f:
         writer = csv.DictWriter(f, output_dict[0].keys())
         writer.writeheader()
         writer.writerows(output_dict)
 
 
-main()
+def main():
+    # get_team_members_yearly_salary()
+    # print(get_team_members_yearly_salary())
+    save_output(test())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="print time spent per stage and request/parse counters afterwards",
+    )
+    args = parser.parse_args()
+
+    main()
+    if args.timings:
+        print(get_stage_breakdown())
@@ -0,0 +1,194 @@
+"""
+Contributions crawled from the live site: product pages, then the profile of
+every team member they list. Kept apart from contribution.py so offline solves
+never import the HTTP and HTML parsing stack.
+"""
+
+import json
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Iterable, Iterator, Optional
+
+from concurrency import DEFAULT_MAX_WORKERS, map_concurrently
+from contribution import Contribution
+from gateway import get_ogp_api_people_info_response
+from models import OgpProduct, OgpProductTeamMember, OgpTeamMember
+from parse_pool import DEFAULT_PARSE_BATCH_SIZE, map_parse
+from products import (
+    IncompleteCrawlError,
+    ProductFailure,
+    iter_ogp_products,
+    iter_ogp_products_with_parse_pool,
+)
+from team_member import (
+    get_team_member_from_values,
+    get_team_member_info,
+    get_team_member_values,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _TeamMemberResolver:
+    """Fetches each team member profile at most once, starting the fetch as soon
+    as the first product listing that member arrives"""
+
+    def __init__(self, executor: ThreadPoolExecutor) -> None:
+        self._executor = executor
+        self._futures: dict[str, Future[OgpTeamMember]] = {}
+
+    def submit(self, team_member: OgpProductTeamMember) -> None:
+        if team_member.path in self._futures:
+            return
+        self._futures[team_member.path] = self._executor.submit(
+            get_team_member_info, team_member.path, team_member.default_name
+        )
+
+    def get(self, team_member: OgpProductTeamMember) -> OgpTeamMember:
+        self.submit(team_member)
+        try:
+            return self._futures[team_member.path].result()
+        except Exception as e:
+            logger.warning("Failed to fetch team member %s: %r", team_member.path, e)
+            return OgpTeamMember(
+                profile_picture="",
+                name=team_member.default_name,
+                title="",
+                join_date=None,
+            )
+
+
+def _iter_contributions_by_product(
+    ogp_product: OgpProduct, team_member_resolver: _TeamMemberResolver
+) -> Iterator[Contribution]:
+    for team_member in ogp_product.team_members:
+        team_member_resolver.submit(team_member)
+
+    for team_member in ogp_product.team_members:
+        team_member_info = team_member_resolver.get(team_member)
+        yield Contribution(
+            product_name=ogp_product.name,
+            team_member_name=team_member_info.name,
+            team_member_contribution=team_member.involvement,
+            team_member_title=team_member_info.title,
+            product_salary_cost=ogp_product.cost.salary,
+        )
+
+
+def _get_team_members_with_parse_pool(
+    team_members: list[OgpProductTeamMember],
+    max_workers: int,
+    parse_workers: int,
+    parse_batch_size: int,
+) -> dict[str, OgpTeamMember]:
+    """Downloads every team member profile with up to max_workers concurrent
+    requests, then parses the raw HTML across parse_workers processes"""
+    ogp_api_people_info_responses = map_concurrently(
+        lambda team_member: get_ogp_api_people_info_response(team_member.path),
+        team_members,
+        max_workers,
+    )
+    team_members_values = map_parse(
+        get_team_member_values,
+        (
+            (result, team_member.default_name)
+            for team_member, result in zip(team_members, ogp_api_people_info_responses)
+            if not isinstance(result, Exception)
+        ),
+        parse_workers,
+        parse_batch_size,
+    )
+
+    team_members_by_path: dict[str, OgpTeamMember] = {}
+    team_members_values_iter = iter(team_members_values)
+    for team_member, result in zip(team_members, ogp_api_people_info_responses):
+        if not isinstance(result, Exception):
+            result = next(team_members_values_iter)
+        if isinstance(result, Exception):
+            logger.warning(
+                "Failed to fetch team member %s: %r", team_member.path, result
+            )
+            team_members_by_path[team_member.path] = OgpTeamMember(
+                profile_picture="",
+                name=team_member.default_name,
+                title="",
+                join_date=None,
+            )
+            continue
+        team_members_by_path[team_member.path] = get_team_member_from_values(result)
+    return team_members_by_path
+
+
+def _iter_contributions_with_parse_pool(
+    max_workers: int,
+    parse_workers: int,
+    parse_batch_size: int,
+    failures: list[ProductFailure],
+) -> Iterator[Contribution]:
+    ogp_products = list(
+        iter_ogp_products_with_parse_pool(
+            max_workers, parse_workers, parse_batch_size, failures
+        )
+    )
+    team_members = list(
+        {
+            team_member.path: team_member
+            for ogp_product in ogp_products
+            for team_member in ogp_product.team_members
+        }.values()
+    )
+    team_members_by_path = _get_team_members_with_parse_pool(
+        team_members, max_workers, parse_workers, parse_batch_size
+    )
+
+    for ogp_product in ogp_products:
+        for team_member in ogp_product.team_members:
+            team_member_info = team_members_by_path[team_member.path]
+            yield Contribution(
+                product_name=ogp_product.name,
+                team_member_name=team_member_info.name,
+                team_member_contribution=team_member.involvement,
+                team_member_title=team_member_info.title,
+                product_salary_cost=ogp_product.cost.salary,
+            )
+
+
+def iter_api_contributions(
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    parse_workers: Optional[int] = None,
+    parse_batch_size: Optional[int] = None,
+    allow_partial: bool = False,
+) -> Iterator[Contribution]:
+    """Product pages and team member profiles are fetched concurrently while
+    earlier products are being consumed. With parse_workers set, pages are
+    downloaded first and then parsed in a process pool instead.
+    Raises IncompleteCrawlError after the last contribution if any product
+    failed, unless allow_partial is set"""
+    failures: list[ProductFailure] = []
+    if parse_workers is not None:
+        yield from _iter_contributions_with_parse_pool(
+            max_workers,
+            parse_workers,
+            parse_batch_size or DEFAULT_PARSE_BATCH_SIZE,
+            failures,
+        )
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            team_member_resolver = _TeamMemberResolver(executor)
+            for ogp_product in iter_ogp_products(max_workers, failures):
+                yield from _iter_contributions_by_product(
+                    ogp_product, team_member_resolver
+                )
+
+    if failures and not allow_partial:
+        raise IncompleteCrawlError(failures)
+
+
+def save_contributions(contributions: Iterable[Contribution], path: str) -> int:
+    """Writes contributions in the data.json format read by offline runs and
+    returns how many were written"""
+    rows = [asdict(contribution) for contribution in contributions]
+    with open(path, "w") as file:
+        json.dump(rows, file, indent=2)
+    return len(rows)
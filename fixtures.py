@@ -0,0 +1,78 @@
+from typing import Mapping, Optional
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from http_cache import ResponseCache
+
+# Fixture sets are response cache directories: pages recorded by a crawl into
+# OGP_CACHE_DIR can be replayed as they are, and synthetic sets use the same
+# layout
+
+
+def _get_fixture_response(
+    fixtures: ResponseCache, url: str, headers: Mapping[str, str]
+) -> tuple[int, str, dict[str, str]]:
+    """Status, body and headers replayed for url. Unknown URLs answer 404, and
+    a matching If-None-Match answers 304 like the live site"""
+    cached_response = fixtures.get(url)
+    if cached_response is None:
+        return 404, "", {}
+
+    response_headers: dict[str, str] = {}
+    if cached_response.etag is not None:
+        response_headers["ETag"] = cached_response.etag
+        if headers.get("If-None-Match") == cached_response.etag:
+            return 304, "", response_headers
+    if cached_response.last_modified is not None:
+        response_headers["Last-Modified"] = cached_response.last_modified
+    return 200, cached_response.text, response_headers
+
+
+class FixtureAdapter(BaseAdapter):
+    """requests transport adapter answering from a fixture set instead of the
+    network"""
+
+    def __init__(self, fixtures: ResponseCache) -> None:
+        super().__init__()
+        self.fixtures = fixtures
+
+    def send(
+        self, request: PreparedRequest, stream: bool = False, **kwargs
+    ) -> Response:
+        status_code, text, headers = _get_fixture_response(
+            self.fixtures, request.url or "", request.headers
+        )
+        response = Response()
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = text.encode()
+        response.encoding = "utf-8"
+        response.url = request.url or ""
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+def get_fixture_async_transport(
+    fixtures: ResponseCache,
+) -> Optional["httpx.MockTransport"]:
+    """httpx counterpart of FixtureAdapter, or None without httpx installed"""
+    if httpx is None:
+        return None
+
+    def _handle_request(request: "httpx.Request") -> "httpx.Response":
+        status_code, text, headers = _get_fixture_response(
+            fixtures, str(request.url), request.headers
+        )
+        return httpx.Response(status_code, text=text, headers=headers)
+
+    return httpx.MockTransport(_handle_request)
@@ -1,4 +1,31 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Mapping, Optional
+from urllib.parse import urlsplit
+
 import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from fixtures import FixtureAdapter, get_fixture_async_transport
+from http_cache import CachedResponse, ResponseCache
+from metrics import (
+    CACHE_HITS,
+    CACHE_MISSES,
+    CACHE_REVALIDATIONS,
+    HTTP_REQUESTS,
+    HTTP_RESPONSE_BYTES,
+    HTTP_STAGE,
+    increment,
+    timed,
+)
 
 OGP_PRODUCTS_URL = "https://products.open.gov.sg/"
 OGP_BASE_URL = "https://open.gov.sg/"
@@ -10,32 +37,310 @@ CORPORATE_OVERHEAD_HTML_TAG = "Corporate Overhead"
 EQUIPMENT_SOFTWARE_AND_OFFICE_HTML_TAG = "Equipment, Software & Office"
 OTHERS_HTML_TAG = "Others"
 
+CACHE_DIR = os.environ.get("OGP_CACHE_DIR", ".cache/http")
+CACHE_TTL_SECONDS = float(os.environ.get("OGP_CACHE_TTL_SECONDS", 6 * 60 * 60))
+OFFLINE = os.environ.get("OGP_OFFLINE", "") not in ("", "0")
+FIXTURES_DIR = os.environ.get("OGP_FIXTURES_DIR")
+
+REQUEST_TIMEOUT_SECONDS = 5
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+MAX_CONNECTIONS_PER_HOST = 8
+
+response_cache = ResponseCache(CACHE_DIR)
+fixtures: Optional[ResponseCache] = (
+    ResponseCache(FIXTURES_DIR) if FIXTURES_DIR is not None else None
+)
+
+
+class GatewayError(Exception):
+    """Base class for failures fetching pages from OGP"""
+
+    def __init__(self, url: str, message: str = "") -> None:
+        super().__init__(f"{url}: {message}" if message else url)
+        self.url = url
+
+
+class OfflineCacheMissError(GatewayError):
+    """Raised in offline mode when a URL was never cached by a previous crawl"""
+
+
+class GatewayTimeoutError(GatewayError):
+    """Raised when a request still times out after all retries"""
+
+
+class GatewayConnectionError(GatewayError):
+    """Raised when a connection still cannot be established after all retries"""
+
+
+class GatewayHttpError(GatewayError):
+    """Raised when OGP answers with a status other than 2xx or 304"""
+
+    def __init__(self, url: str, status_code: int) -> None:
+        super().__init__(url, f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class GatewayServerError(GatewayHttpError):
+    """Raised when OGP still answers with a 5xx or 429 status after all
+    retries"""
+
+
+def _is_retryable_status(status_code: int) -> bool:
+    return status_code >= 500 or status_code == 429
+
+
+def _is_successful_status(status_code: int) -> bool:
+    return 200 <= status_code < 300 or status_code == 304
+
+
+def _get_session() -> requests.Session:
+    """Pooled keep-alive session, or one replaying the fixture set when
+    fixtures are in use"""
+    session = requests.Session()
+    adapter: BaseAdapter
+    if fixtures is not None:
+        adapter = FixtureAdapter(fixtures)
+    else:
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=MAX_CONNECTIONS_PER_HOST,
+            pool_block=True,
+        )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = _get_session()
+_host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_host_semaphores_lock = threading.Lock()
+_async_client: Optional["httpx.AsyncClient"] = None
+_async_host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+
+def _get_host_semaphore(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(
+                MAX_CONNECTIONS_PER_HOST
+            )
+        return _host_semaphores[host]
+
+
+def _get_backoff_seconds(attempt: int) -> float:
+    """Full-jitter exponential backoff"""
+    return random.uniform(
+        0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt)
+    )
+
+
+def _get(url: str, headers: Optional[dict[str, str]] = None) -> requests.Response:
+    """GETs url over the shared keep-alive session, retrying timeouts,
+    connection failures, 5xx and 429 responses with jittered exponential
+    backoff. Any other status but 2xx or 304 raises GatewayHttpError"""
+    error: GatewayError
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            with _get_host_semaphore(url), timed(HTTP_STAGE):
+                increment(HTTP_REQUESTS)
+                response = _session.get(
+                    url, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS
+                )
+        except requests.Timeout as e:
+            error = GatewayTimeoutError(url)
+            error.__cause__ = e
+        except requests.ConnectionError as e:
+            error = GatewayConnectionError(url)
+            error.__cause__ = e
+        except requests.RequestException as e:
+            raise GatewayError(url, str(e)) from e
+        else:
+            increment(HTTP_RESPONSE_BYTES, len(response.content))
+            if _is_successful_status(response.status_code):
+                return response
+            if not _is_retryable_status(response.status_code):
+                raise GatewayHttpError(url, response.status_code)
+            error = GatewayServerError(url, response.status_code)
+
+        if attempt < MAX_RETRIES:
+            time.sleep(_get_backoff_seconds(attempt))
+    raise error
+
+
+def _get_cached_response(
+    url: str, revalidate: bool = False
+) -> tuple[Optional[str], Optional[CachedResponse]]:
+    """Returns the cached text while it is fresh and revalidate is not asked for,
+    or in offline mode regardless of age, alongside any cached entry to
+    revalidate"""
+    cached_response = response_cache.get(url)
+    if cached_response is not None and (
+        OFFLINE or (not revalidate and cached_response.is_fresh(CACHE_TTL_SECONDS))
+    ):
+        increment(CACHE_HITS)
+        return cached_response.text, cached_response
+    increment(CACHE_MISSES)
+    if OFFLINE:
+        raise OfflineCacheMissError(url)
+    return None, cached_response
+
+
+def _get_revalidation_headers(
+    cached_response: Optional[CachedResponse],
+) -> dict[str, str]:
+    if cached_response is None:
+        return {}
+    return cached_response.get_revalidation_headers()
+
+
+def _get_text_and_update_cache(
+    url: str,
+    cached_response: Optional[CachedResponse],
+    status_code: int,
+    text: str,
+    headers: Mapping[str, str],
+) -> str:
+    if status_code == 304 and cached_response is not None:
+        increment(CACHE_REVALIDATIONS)
+        response_cache.touch(cached_response)
+        return cached_response.text
+
+    if status_code == 200:
+        response_cache.set(
+            CachedResponse(
+                url=url,
+                text=text,
+                etag=headers.get("ETag"),
+                last_modified=headers.get("Last-Modified"),
+                fetched_at=time.time(),
+            )
+        )
+    return text
+
+
+def _get_response_text(url: str, revalidate: bool = False) -> str:
+    """Serves url from the response cache while fresh, otherwise revalidates it
+    with If-None-Match / If-Modified-Since. revalidate skips the freshness check
+    so a cached page is always revalidated. In offline mode only the cache is
+    consulted, regardless of age"""
+    cached_text, cached_response = _get_cached_response(url, revalidate)
+    if cached_text is not None:
+        return cached_text
+
+    response = _get(url, _get_revalidation_headers(cached_response))
+    return _get_text_and_update_cache(
+        url, cached_response, response.status_code, response.text, response.headers
+    )
+
+
+def _get_async_client() -> "httpx.AsyncClient":
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_keepalive_connections=MAX_CONNECTIONS_PER_HOST),
+            transport=(
+                get_fixture_async_transport(fixtures) if fixtures is not None else None
+            ),
+        )
+    return _async_client
+
+
+def use_fixtures(fixtures_dir: Optional[str]) -> None:
+    """Replays every request from the fixture set in fixtures_dir instead of the
+    network, like setting OGP_FIXTURES_DIR. None goes back to the network"""
+    global fixtures, _session, _async_client
+    fixtures = ResponseCache(fixtures_dir) if fixtures_dir is not None else None
+    _session.close()
+    _session = _get_session()
+    _async_client = None
+
+
+def _get_async_host_semaphore(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    if host not in _async_host_semaphores:
+        _async_host_semaphores[host] = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+    return _async_host_semaphores[host]
+
+
+async def _async_get(
+    url: str, headers: dict[str, str]
+) -> tuple[int, str, Mapping[str, str]]:
+    """Async counterpart of _get over a shared httpx.AsyncClient. Without httpx
+    installed the blocking session is run in a worker thread instead"""
+    if httpx is None:
+        response = await asyncio.to_thread(_get, url, headers)
+        return response.status_code, response.text, response.headers
+
+    error: GatewayError
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with _get_async_host_semaphore(url):
+                with timed(HTTP_STAGE):
+                    increment(HTTP_REQUESTS)
+                    response = await _get_async_client().get(url, headers=headers)
+        except httpx.TimeoutException as e:
+            error = GatewayTimeoutError(url)
+            error.__cause__ = e
+        except httpx.TransportError as e:
+            error = GatewayConnectionError(url)
+            error.__cause__ = e
+        except httpx.HTTPError as e:
+            raise GatewayError(url, str(e)) from e
+        else:
+            increment(HTTP_RESPONSE_BYTES, len(response.content))
+            if _is_successful_status(response.status_code):
+                return response.status_code, response.text, response.headers
+            if not _is_retryable_status(response.status_code):
+                raise GatewayHttpError(url, response.status_code)
+            error = GatewayServerError(url, response.status_code)
+
+        if attempt < MAX_RETRIES:
+            await asyncio.sleep(_get_backoff_seconds(attempt))
+    raise error
+
+
+async def _async_get_response_text(url: str, revalidate: bool = False) -> str:
+    cached_text, cached_response = _get_cached_response(url, revalidate)
+    if cached_text is not None:
+        return cached_text
+
+    status_code, text, headers = await _async_get(
+        url, _get_revalidation_headers(cached_response)
+    )
+    return _get_text_and_update_cache(url, cached_response, status_code, text, headers)
+
 
 def get_ogp_api_products_response(
-    url: str = OGP_PRODUCTS_URL,
+    url: str = OGP_PRODUCTS_URL, revalidate: bool = False
 ) -> str:
-    try:
-        ogp_products_response = requests.get(url, timeout=5)
-        return ogp_products_response.text
-    except Exception:
-        raise Exception  # To handle custom error here
+    return _get_response_text(url, revalidate)
 
 
-def get_ogp_api_product_info_response(
-    url: str,
+def get_ogp_api_product_info_response(url: str, revalidate: bool = False) -> str:
+    return _get_response_text(url, revalidate)
+
+
+def get_ogp_api_people_info_response(url: str, revalidate: bool = False) -> str:
+    return _get_response_text(url, revalidate)
+
+
+async def async_get_ogp_api_products_response(
+    url: str = OGP_PRODUCTS_URL, revalidate: bool = False
 ) -> str:
-    try:
-        ogp_product_info_response = requests.get(url, timeout=5)
-        return ogp_product_info_response.text
-    except Exception:
-        raise Exception  # To handle custom error here
+    return await _async_get_response_text(url, revalidate)
 
 
-def get_ogp_api_people_info_response(
-    url: str,
+async def async_get_ogp_api_product_info_response(
+    url: str, revalidate: bool = False
+) -> str:
+    return await _async_get_response_text(url, revalidate)
+
+
+async def async_get_ogp_api_people_info_response(
+    url: str, revalidate: bool = False
 ) -> str:
-    try:
-        ogp_people_info_response = requests.get(url, timeout=5)
-        return ogp_people_info_response.text
-    except Exception:
-        raise Exception  # To handle custom error here
+    return await _async_get_response_text(url, revalidate)
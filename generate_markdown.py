@@ -1,14 +1,29 @@
 import json
+from typing import Iterable
 
-from models import StaffResponse
 
-with open("data.json") as file:
-    loaded_file = json.load(file)
+def get_salary_markdown(staff_salaries: Iterable[tuple[str, str, float]]) -> str:
+    """Markdown table of (name, title, annual salary), highest salary first"""
+    lines = ["| Name | Title | Annual Salary |", "| ---- | ---- | ---- |"]
+    for name, title, salary in sorted(
+        staff_salaries, key=lambda staff: staff[2], reverse=True
+    ):
+        lines.append(f"|{name} | {title} | ${salary:,.0f}|")
+    return "\n".join(lines)
+
+
+def main(path: str = "data.json") -> None:
+    from models import StaffResponse
+
+    with open(path) as file:
+        loaded_file = json.load(file)
     all_staff_data = [StaffResponse(**i) for i in loaded_file]
-    sorted_all_staff_data = sorted(
-        all_staff_data, key=lambda staff: staff.salary, reverse=True
+    print(
+        get_salary_markdown(
+            (staff.name, staff.title, staff.salary) for staff in all_staff_data
+        )
     )
-    print("| Name | Title | Annual Salary |")
-    print("| ---- | ---- | ---- |")
-    for staff in sorted_all_staff_data:
-        print(f"|{staff.name} | {staff.title} | ${staff.salary:,.0f}|")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Append-only store of dated crawl snapshots in SQLite.
+
+Each snapshot is solved once when it is appended, and its contributions and
+salary estimates are stored alongside it, so trajectories across quarters are
+plain indexed lookups.
+
+Usage:
+    python history.py add data.json 2024-04-11
+    python history.py person "Alexis Goh"
+    python history.py product activesg
+"""
+
+import argparse
+import json
+import sqlite3
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from contribution import (
+    Contribution,
+    _get_current_product_contribution_matrix,
+    _get_quarterly_team_members_cost_with_least_squares_method,
+    _get_yearly_salary,
+)
+
+DEFAULT_HISTORY_PATH = "history.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    snapshot_date TEXT NOT NULL UNIQUE,
+    quarter TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contributions (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    product_name TEXT NOT NULL,
+    team_member_name TEXT NOT NULL,
+    team_member_contribution REAL NOT NULL,
+    team_member_title TEXT NOT NULL,
+    product_salary_cost REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS team_member_estimates (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    team_member_name TEXT NOT NULL,
+    yearly_salary REAL NOT NULL,
+    PRIMARY KEY (team_member_name, snapshot_id)
+);
+CREATE TABLE IF NOT EXISTS product_estimates (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    product_name TEXT NOT NULL,
+    quarterly_salary_cost REAL NOT NULL,
+    estimated_quarterly_salary_cost REAL NOT NULL,
+    team_size INTEGER NOT NULL,
+    PRIMARY KEY (product_name, snapshot_id)
+);
+CREATE INDEX IF NOT EXISTS contributions_by_snapshot
+    ON contributions (snapshot_id);
+CREATE INDEX IF NOT EXISTS contributions_by_product
+    ON contributions (product_name, snapshot_id);
+CREATE INDEX IF NOT EXISTS contributions_by_team_member
+    ON contributions (team_member_name, snapshot_id);
+"""
+
+
+class SnapshotExistsError(Exception):
+    """Raised when appending a snapshot for a date that is already stored"""
+
+
+@dataclass
+class TeamMemberSalaryPoint:
+    snapshot_date: date
+    quarter: str
+    yearly_salary: float
+
+
+@dataclass
+class ProductSalaryPoint:
+    snapshot_date: date
+    quarter: str
+    quarterly_salary_cost: float
+    estimated_quarterly_salary_cost: float
+    team_size: int
+
+
+def _get_quarter(snapshot_date: date) -> str:
+    return f"{snapshot_date.year}Q{(snapshot_date.month - 1) // 3 + 1}"
+
+
+class SnapshotStore:
+    def __init__(self, path: Union[str, Path] = DEFAULT_HISTORY_PATH) -> None:
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def append_snapshot(
+        self,
+        snapshot_date: date,
+        contributions: Iterable[Contribution],
+        solver_backend: Optional[str] = None,
+    ) -> int:
+        """Solves the snapshot once and stores it with its estimates"""
+        contributions = list(contributions)
+        product_contribution_matrix = _get_current_product_contribution_matrix(
+            contributions
+        )
+        team_members_quarterly_salary = (
+            _get_quarterly_team_members_cost_with_least_squares_method(
+                product_contribution_matrix.matrix,
+                product_contribution_matrix.quarterly_product_costs,
+                solver_backend,
+            )
+        )
+        estimated_product_costs = (
+            product_contribution_matrix.matrix @ team_members_quarterly_salary
+        )
+        team_sizes = np.asarray(
+            (product_contribution_matrix.matrix != 0).sum(axis=1)
+        ).ravel()
+
+        with self.connection:
+            try:
+                cursor = self.connection.execute(
+                    "INSERT INTO snapshots (snapshot_date, quarter, created_at) "
+                    "VALUES (?, ?, ?)",
+                    (
+                        snapshot_date.isoformat(),
+                        _get_quarter(snapshot_date),
+                        datetime.now().isoformat(),
+                    ),
+                )
+            except sqlite3.IntegrityError as e:
+                raise SnapshotExistsError(snapshot_date.isoformat()) from e
+            snapshot_id = cursor.lastrowid
+
+            self.connection.executemany(
+                "INSERT INTO contributions VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        snapshot_id,
+                        contribution.product_name,
+                        contribution.team_member_name,
+                        contribution.team_member_contribution,
+                        contribution.team_member_title,
+                        contribution.product_salary_cost,
+                    )
+                    for contribution in contributions
+                ),
+            )
+            self.connection.executemany(
+                "INSERT INTO team_member_estimates VALUES (?, ?, ?)",
+                (
+                    (snapshot_id, str(name), _get_yearly_salary(float(salary)))
+                    for name, salary in zip(
+                        product_contribution_matrix.team_member_names,
+                        team_members_quarterly_salary,
+                    )
+                ),
+            )
+            self.connection.executemany(
+                "INSERT INTO product_estimates VALUES (?, ?, ?, ?, ?)",
+                (
+                    (snapshot_id, str(name), float(cost), float(estimate), int(size))
+                    for name, cost, estimate, size in zip(
+                        product_contribution_matrix.product_names,
+                        product_contribution_matrix.quarterly_product_costs,
+                        estimated_product_costs,
+                        team_sizes,
+                    )
+                ),
+            )
+        return snapshot_id
+
+    def get_snapshot_dates(self) -> list[date]:
+        rows = self.connection.execute(
+            "SELECT snapshot_date FROM snapshots ORDER BY snapshot_date"
+        )
+        return [date.fromisoformat(snapshot_date) for (snapshot_date,) in rows]
+
+    def get_contributions(self, snapshot_date: date) -> list[Contribution]:
+        rows = self.connection.execute(
+            "SELECT product_name, team_member_name, team_member_contribution, "
+            "team_member_title, product_salary_cost FROM contributions "
+            "JOIN snapshots ON snapshots.id = contributions.snapshot_id "
+            "WHERE snapshot_date = ? ORDER BY contributions.rowid",
+            (snapshot_date.isoformat(),),
+        )
+        return [Contribution(*row) for row in rows]
+
+    def get_team_member_salary_trajectory(
+        self, team_member_name: str
+    ) -> list[TeamMemberSalaryPoint]:
+        rows = self.connection.execute(
+            "SELECT snapshot_date, quarter, yearly_salary FROM team_member_estimates "
+            "JOIN snapshots ON snapshots.id = team_member_estimates.snapshot_id "
+            "WHERE team_member_name = ? ORDER BY snapshot_date",
+            (team_member_name,),
+        )
+        return [
+            TeamMemberSalaryPoint(date.fromisoformat(snapshot_date), quarter, salary)
+            for snapshot_date, quarter, salary in rows
+        ]
+
+    def get_product_salary_trajectory(
+        self, product_name: str
+    ) -> list[ProductSalaryPoint]:
+        rows = self.connection.execute(
+            "SELECT snapshot_date, quarter, quarterly_salary_cost, "
+            "estimated_quarterly_salary_cost, team_size FROM product_estimates "
+            "JOIN snapshots ON snapshots.id = product_estimates.snapshot_id "
+            "WHERE product_name = ? ORDER BY snapshot_date",
+            (product_name,),
+        )
+        return [
+            ProductSalaryPoint(date.fromisoformat(snapshot_date), *values)
+            for snapshot_date, *values in rows
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", default=DEFAULT_HISTORY_PATH)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    add_parser = subparsers.add_parser("add", help="Append a data.json snapshot")
+    add_parser.add_argument("json_path")
+    add_parser.add_argument("snapshot_date", type=date.fromisoformat)
+    person_parser = subparsers.add_parser("person", help="Salary trajectory")
+    person_parser.add_argument("name")
+    product_parser = subparsers.add_parser("product", help="Product trajectory")
+    product_parser.add_argument("name")
+    args = parser.parse_args()
+
+    snapshot_store = SnapshotStore(args.db)
+    try:
+        if args.command == "add":
+            with open(args.json_path) as file:
+                contributions = [Contribution(**i) for i in json.load(file)]
+            snapshot_store.append_snapshot(args.snapshot_date, contributions)
+        elif args.command == "person":
+            for point in snapshot_store.get_team_member_salary_trajectory(args.name):
+                print(asdict(point))
+        elif args.command == "product":
+            for point in snapshot_store.get_product_salary_trajectory(args.name):
+                print(asdict(point))
+    finally:
+        snapshot_store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return time.time() - self.fetched_at < ttl_seconds
+
+    def get_revalidation_headers(self) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Persistent response bodies keyed by URL, one JSON file per URL"""
+
+    def __init__(self, cache_dir: Union[str, Path]) -> None:
+        self.cache_dir = Path(cache_dir)
+
+    def _get_cache_path(self, url: str) -> Path:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        try:
+            with open(self._get_cache_path(url)) as file:
+                return CachedResponse(**json.load(file))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def set(self, cached_response: CachedResponse) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_path = self._get_cache_path(cached_response.url)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.{id(cached_response)}.tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(asdict(cached_response), file)
+        os.replace(tmp_path, cache_path)
+
+    def touch(self, cached_response: CachedResponse) -> None:
+        cached_response.fetched_at = time.time()
+        self.set(cached_response)
+
+    def iter_cached_responses(self) -> Iterator[CachedResponse]:
+        for cache_path in sorted(self.cache_dir.glob("*.json")):
+            try:
+                with open(cache_path) as file:
+                    yield CachedResponse(**json.load(file))
+            except (OSError, ValueError, TypeError):
+                continue
@@ -1,14 +1,27 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from dataclasses import asdict, dataclass
-from typing import Union
+from datetime import datetime
+from typing import Literal, Optional, Union
 
-import numpy as np
-import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-from gateway import get_ogp_api_all_repos_response, get_ogp_api_product_cost_response
-from models import OgpRepo, StaffResponse
+from metrics import CRAWL_STAGE, MATRIX_BUILD_STAGE, get_prometheus_text, timed
+from models import (
+    CacheStatusResponse,
+    OgpRepo,
+    PartialStaffResponse,
+    StaffResponse,
+)
+from refresh_cache import AsyncRefreshingCache
+from snapshot import OgpSnapshot, async_get_ogp_snapshot, get_ogp_snapshot
+from solver import solve_least_squares
 from staff import Staff, get_all_staff_data
+from staff_index import StaffResponseIndex, get_staff_json
 
 
 @dataclass
@@ -33,6 +46,7 @@ def get_all_staff_contribution_per_product(
     return contribution
 
 
+@timed(MATRIX_BUILD_STAGE)
 def get_ogp_product_contribution_matrix(
     all_staff_data: list[Staff], ogp_repos_response: list[OgpRepo]
 ) -> list[list[Union[int, float]]]:
@@ -51,13 +65,8 @@ def get_ogp_product_contribution_matrix(
     return contribution_matrix
 
 
-def get_ogp_product_costs() -> list[float]:
-    all_ogp_api_all_repos_response = get_ogp_api_all_repos_response()
-    ogp_product_costs = [
-        get_ogp_api_product_cost_response(ogp_api_repo_response.path).salary
-        for ogp_api_repo_response in all_ogp_api_all_repos_response
-    ]
-    return ogp_product_costs
+def get_ogp_product_costs(ogp_snapshot: OgpSnapshot) -> list[float]:
+    return list(ogp_snapshot.product_costs)
 
 
 MONTHS_IN_YEAR = 12
@@ -75,13 +84,11 @@ def _get_yearly_salary(
 def get_quarterly_staff_costs_with_least_squares_method(
     product_contribution_matrix: list[list[Union[int, float]]],
     quarterly_product_costs: list[float],
+    solver_backend: Optional[str] = None,
 ):
-    staff_costs, _, _, _ = np.linalg.lstsq(
-        np.array(product_contribution_matrix),
-        np.array(quarterly_product_costs),
-        rcond=None,
-    )
-    return staff_costs
+    return solve_least_squares(
+        product_contribution_matrix, quarterly_product_costs, solver_backend
+    ).x
 
 
 def get_all_staff_annual_salary(
@@ -111,13 +118,17 @@ def get_all_staff_annual_salary(
     return all_staff_annual_salary
 
 
-def get_staff_response() -> list[StaffResponse]:
+def get_staff_response(
+    ogp_snapshot: Optional[OgpSnapshot] = None,
+    parse_workers: Optional[int] = None,
+) -> list[StaffResponse]:
+    if ogp_snapshot is None:
+        ogp_snapshot = get_ogp_snapshot()
     staff_response: list[StaffResponse] = []
-    all_staff_data = get_all_staff_data()
-    all_ogp_repos_response = get_ogp_api_all_repos_response()
-    ogp_product_costs = get_ogp_product_costs()
+    all_staff_data = get_all_staff_data(ogp_snapshot, parse_workers)
+    ogp_product_costs = get_ogp_product_costs(ogp_snapshot)
     all_staff_annual_salary = get_all_staff_annual_salary(
-        all_staff_data, all_ogp_repos_response, ogp_product_costs
+        all_staff_data, list(ogp_snapshot.repos), ogp_product_costs
     )
     for staff_data in all_staff_data:
         staff_name = staff_data.name
@@ -133,12 +144,13 @@ def get_staff_response() -> list[StaffResponse]:
     return staff_response
 
 
-def display_staff_salaries() -> None:
-    all_staff_data = get_all_staff_data()
-    all_ogp_repos_response = get_ogp_api_all_repos_response()
-    ogp_product_costs = get_ogp_product_costs()
+def display_staff_salaries(ogp_snapshot: Optional[OgpSnapshot] = None) -> None:
+    if ogp_snapshot is None:
+        ogp_snapshot = get_ogp_snapshot()
+    all_staff_data = get_all_staff_data(ogp_snapshot)
+    ogp_product_costs = get_ogp_product_costs(ogp_snapshot)
     all_staff_annual_salary = get_all_staff_annual_salary(
-        all_staff_data, all_ogp_repos_response, ogp_product_costs
+        all_staff_data, list(ogp_snapshot.repos), ogp_product_costs
     )
     sorted_all_staff_annual_salary = sorted(
         all_staff_annual_salary, key=lambda staff: staff.salary, reverse=True
@@ -147,13 +159,157 @@ def display_staff_salaries() -> None:
         print(individual_staff_annual_salary)
 
 
-app = FastAPI()
+STAFF_RESPONSE_TTL_SECONDS = float(os.environ.get("STAFF_RESPONSE_TTL_SECONDS", 3600))
+STAFF_RESPONSE_REFRESH_INTERVAL_SECONDS = float(
+    os.environ.get("STAFF_RESPONSE_REFRESH_INTERVAL_SECONDS", 3600)
+)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# People pages are parsed in a process pool of this size when set, serially
+# otherwise
+PARSE_WORKERS: Optional[int] = (
+    int(os.environ["OGP_PARSE_WORKERS"]) if "OGP_PARSE_WORKERS" in os.environ else None
+)
+
+
+async def _compute_staff_response_index() -> StaffResponseIndex:
+    """Crawls on the event loop, then parses and solves in a worker thread.
+    Every refresh revalidates the cached pages, so it sees changes on OGP even
+    within the response cache TTL"""
+    with timed(CRAWL_STAGE):
+        ogp_snapshot = await async_get_ogp_snapshot(revalidate=True)
+    return await run_in_threadpool(
+        lambda: StaffResponseIndex(get_staff_response(ogp_snapshot, PARSE_WORKERS))
+    )
+
+
+staff_response_cache: AsyncRefreshingCache[StaffResponseIndex] = AsyncRefreshingCache(
+    _compute_staff_response_index, STAFF_RESPONSE_TTL_SECONDS
+)
+
+
+async def _refresh_staff_response_periodically() -> None:
+    while True:
+        await staff_response_cache.refresh()
+        await asyncio.sleep(STAFF_RESPONSE_REFRESH_INTERVAL_SECONDS)
 
 
-@app.get("/")
-def get_staff_salaries() -> list[StaffResponse]:
-    return get_staff_response()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    refresh_task = asyncio.create_task(_refresh_staff_response_periodically())
+    yield
+    refresh_task.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def _get_cache_status_response() -> CacheStatusResponse:
+    refreshed_at = staff_response_cache.refreshed_at
+    return CacheStatusResponse(
+        refreshed_at=(
+            datetime.fromtimestamp(refreshed_at) if refreshed_at is not None else None
+        ),
+        age_seconds=staff_response_cache.get_age_seconds(),
+        ttl_seconds=staff_response_cache.ttl_seconds,
+        is_stale=staff_response_cache.is_stale(),
+        is_refreshing=staff_response_cache.is_refreshing,
+        last_error=staff_response_cache.last_error,
+    )
+
+
+async def _get_staff_response_index() -> StaffResponseIndex:
+    staff_response_index = await staff_response_cache.get()
+    if staff_response_index is None:
+        raise HTTPException(
+            status_code=503, detail=staff_response_cache.last_error or "Unavailable"
+        )
+    return staff_response_index
+
+
+def _get_fields(fields: Optional[str]) -> Optional[set[str]]:
+    if fields is None:
+        return None
+    requested_fields = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown_fields = requested_fields - set(StaffResponse.model_fields)
+    if unknown_fields:
+        raise HTTPException(
+            status_code=422, detail=f"Unknown fields: {sorted(unknown_fields)}"
+        )
+    return requested_fields
+
+
+@app.get("/", response_model=list[PartialStaffResponse])
+async def get_staff_salaries(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    sort: Literal["salary", "name", "start_date"] = "salary",
+    order: Literal["asc", "desc"] = "desc",
+    title: Optional[str] = None,
+    product: Optional[str] = None,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, e.g. name,title,salary"
+    ),
+) -> Response:
+    """One page of matching staff, limit at a time. X-Total-Count holds the
+    number of matches across all pages; /staff.ndjson streams all of them"""
+    included_fields = _get_fields(fields)
+    staff_response_index = await _get_staff_response_index()
+    matching_staff = list(
+        staff_response_index.iter_staff(sort, order == "desc", title, product)
+    )
+    page = matching_staff[offset : offset + limit]
+    content = "[" + ",".join(get_staff_json(i, included_fields) for i in page) + "]"
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={"X-Total-Count": str(len(matching_staff))},
+    )
+
+
+@app.get("/staff.ndjson")
+async def stream_staff_salaries(
+    sort: Literal["salary", "name", "start_date"] = "salary",
+    order: Literal["asc", "desc"] = "desc",
+    title: Optional[str] = None,
+    product: Optional[str] = None,
+    fields: Optional[str] = None,
+) -> StreamingResponse:
+    """One JSON object per line, serialised as the response is streamed"""
+    included_fields = _get_fields(fields)
+    staff_response_index = await _get_staff_response_index()
+    return StreamingResponse(
+        (
+            get_staff_json(staff, included_fields) + "\n"
+            for staff in staff_response_index.iter_staff(
+                sort, order == "desc", title, product
+            )
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.get("/cache")
+async def get_cache_status() -> CacheStatusResponse:
+    return _get_cache_status_response()
+
+
+@app.post("/cache/refresh", status_code=202)
+async def refresh_cache() -> CacheStatusResponse:
+    staff_response_cache.refresh_in_background()
+    return _get_cache_status_response()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Request, cache and parse counters and per-stage timings for Prometheus"""
+    return PlainTextResponse(
+        get_prometheus_text(), media_type="text/plain; version=0.0.4"
+    )
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, port=8000)
@@ -0,0 +1,184 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Mapping, Optional, TypeVar
+
+T = TypeVar("T")
+
+METRIC_PREFIX = "ogp"
+
+HTTP_STAGE = "http"
+PARSE_STAGE = "parse"
+CRAWL_STAGE = "crawl"
+LOAD_STAGE = "load"
+MATRIX_BUILD_STAGE = "matrix_build"
+SOLVE_STAGE = "solve"
+
+HTTP_REQUESTS = "http_requests"
+HTTP_RESPONSE_BYTES = "http_response_bytes"
+CACHE_HITS = "cache_hits"
+CACHE_MISSES = "cache_misses"
+CACHE_REVALIDATIONS = "cache_revalidations"
+PARSE_CALLS = "parse_calls"
+PARSE_BYTES = "parse_bytes"
+
+COUNTER_DESCRIPTIONS = {
+    HTTP_REQUESTS: "Requests sent to OGP, including retries",
+    HTTP_RESPONSE_BYTES: "Response body bytes received from OGP",
+    CACHE_HITS: "Pages served from the response cache without a request",
+    CACHE_MISSES: "Pages that needed a request",
+    CACHE_REVALIDATIONS: "Requests answered 304 Not Modified",
+    PARSE_CALLS: "HTML documents parsed",
+    PARSE_BYTES: "HTML characters parsed",
+}
+
+
+@dataclass
+class StageTiming:
+    calls: int
+    seconds: float
+
+
+class _Span:
+    __slots__ = ("child_seconds",)
+
+    def __init__(self) -> None:
+        self.child_seconds = 0.0
+
+
+_lock = threading.Lock()
+_counters: dict[str, float] = dict.fromkeys(COUNTER_DESCRIPTIONS, 0)
+_stage_timings: dict[str, StageTiming] = {}
+_current_span: ContextVar[Optional[_Span]] = ContextVar("_current_span", default=None)
+
+
+def increment(counter: str, value: float = 1) -> None:
+    with _lock:
+        _counters[counter] = _counters.get(counter, 0) + value
+
+
+def _record(stage: str, seconds: float) -> None:
+    with _lock:
+        stage_timing = _stage_timings.setdefault(stage, StageTiming(0, 0.0))
+        stage_timing.calls += 1
+        stage_timing.seconds += seconds
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Adds the time spent in the block to stage, excluding time spent in
+    stages nested inside it on the same thread or task. Stages running on
+    several threads at once add up, so they can exceed the wall clock time"""
+    parent_span = _current_span.get()
+    span = _Span()
+    token = _current_span.set(span)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        _current_span.reset(token)
+        if parent_span is not None:
+            parent_span.child_seconds += seconds
+        _record(stage, max(seconds - span.child_seconds, 0.0))
+
+
+def timed_iter(stage: str, items: Iterable[T]) -> Iterator[T]:
+    """Yields from items, adding the time spent producing each item to stage.
+    Wrapping a lazy stream this way keeps its cost out of the consumer's
+    stage"""
+    iterator = iter(items)
+    while True:
+        with timed(stage):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def get_counters() -> dict[str, float]:
+    with _lock:
+        return dict(_counters)
+
+
+def get_stage_timings() -> dict[str, StageTiming]:
+    with _lock:
+        return {
+            stage: StageTiming(stage_timing.calls, stage_timing.seconds)
+            for stage, stage_timing in _stage_timings.items()
+        }
+
+
+def merge(
+    counters: Mapping[str, float], stage_timings: Mapping[str, StageTiming]
+) -> None:
+    """Adds counters and stage timings recorded in another process, e.g. a
+    parse worker, to this one's"""
+    with _lock:
+        for counter, value in counters.items():
+            _counters[counter] = _counters.get(counter, 0) + value
+        for stage, stage_timing in stage_timings.items():
+            total = _stage_timings.setdefault(stage, StageTiming(0, 0.0))
+            total.calls += stage_timing.calls
+            total.seconds += stage_timing.seconds
+
+
+def reset() -> None:
+    with _lock:
+        for counter in _counters:
+            _counters[counter] = 0
+        _stage_timings.clear()
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def get_prometheus_text() -> str:
+    """Counters and stage timings in the Prometheus text exposition format"""
+    lines: list[str] = []
+    for counter, value in get_counters().items():
+        name = f"{METRIC_PREFIX}_{counter}_total"
+        description = COUNTER_DESCRIPTIONS.get(counter)
+        if description is not None:
+            lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {_format_value(value)}")
+
+    stage_timings = get_stage_timings()
+    for name, description, attribute in (
+        ("stage_seconds_total", "Time spent in each stage", "seconds"),
+        ("stage_calls_total", "Times each stage was entered", "calls"),
+    ):
+        name = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} counter")
+        for stage, stage_timing in stage_timings.items():
+            value = _format_value(getattr(stage_timing, attribute))
+            lines.append(f'{name}{{stage="{stage}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def get_stage_breakdown() -> str:
+    """Human readable per-stage table, slowest stage first, followed by the
+    counters"""
+    stage_timings = sorted(
+        get_stage_timings().items(), key=lambda i: i[1].seconds, reverse=True
+    )
+    total_seconds = sum(stage_timing.seconds for _, stage_timing in stage_timings)
+    lines = [f"{'stage':<14}{'calls':>8}{'seconds':>10}{'share':>8}"]
+    for stage, stage_timing in stage_timings:
+        share = stage_timing.seconds / total_seconds if total_seconds else 0
+        lines.append(
+            f"{stage:<14}{stage_timing.calls:>8}"
+            f"{stage_timing.seconds:>10.3f}{share:>8.1%}"
+        )
+    lines.append("")
+    for counter, value in get_counters().items():
+        lines.append(f"{counter:<22}{_format_value(value):>12}")
+    return "\n".join(lines)
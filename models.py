@@ -18,6 +18,10 @@ class OgpProductCost(BaseModel):
     others: float
 
 
+class OgpRepo(OgpProductBase):
+    """A product listed on products.open.gov.sg, as used by the API server"""
+
+
 class OgpApiStaffResponse(BaseModel):
     id: str
     name: str
@@ -46,3 +50,45 @@ class OgpTeamMember(BaseModel):
     name: str
     title: str
     join_date: Optional[datetime]
+
+
+class ProductResponse(BaseModel):
+    name: str
+    logo_url: str
+    role: str
+    involvement: float
+    cost: float
+
+
+class StaffResponse(BaseModel):
+    id: str
+    name: str
+    product: list[ProductResponse]
+    title: Optional[str]
+    start_date: Optional[date]
+    termination_date: Optional[date]
+    headshot_url: str
+    salary: float
+
+
+class PartialStaffResponse(BaseModel):
+    """A StaffResponse restricted to the requested fields; the others are
+    omitted rather than null"""
+
+    id: Optional[str] = None
+    name: Optional[str] = None
+    product: Optional[list[ProductResponse]] = None
+    title: Optional[str] = None
+    start_date: Optional[date] = None
+    termination_date: Optional[date] = None
+    headshot_url: Optional[str] = None
+    salary: Optional[float] = None
+
+
+class CacheStatusResponse(BaseModel):
+    refreshed_at: Optional[datetime]
+    age_seconds: Optional[float]
+    ttl_seconds: float
+    is_stale: bool
+    is_refreshing: bool
+    last_error: Optional[str]
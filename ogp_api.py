@@ -0,0 +1,124 @@
+"""
+The product listing, product and people lookups used by the API server, built
+on the scraped pages fetched through gateway. Each product page provides both
+the cost and the team; a team member's staff id is the last segment of their
+people page URL. The async_ variants fetch on the event loop and parse in a
+worker thread.
+
+The pages carry less than the OGP API did, so some fields are filled in rather
+than scraped: every role is "", every terminationDate is None, and staff.name
+is the default name the product page shows for the team member.
+"""
+
+import asyncio
+
+from gateway import (
+    OGP_BASE_URL,
+    async_get_ogp_api_people_info_response,
+    async_get_ogp_api_product_info_response,
+    async_get_ogp_api_products_response,
+    get_ogp_api_people_info_response,
+    get_ogp_api_product_info_response,
+    get_ogp_api_products_response,
+)
+from models import (
+    OgpApiProductMembersResponse,
+    OgpApiStaffResponse,
+    OgpProductCost,
+    OgpRepo,
+)
+from products import (
+    _get_ogp_product_cost,
+    _get_ogp_product_team_members,
+    _get_ogp_products_base,
+)
+from soup import get_soup
+
+
+def get_staff_id(team_member_path: str) -> str:
+    return team_member_path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def get_ogp_repos(ogp_api_products_response: str) -> list[OgpRepo]:
+    return [
+        OgpRepo(**ogp_product_base.model_dump())
+        for ogp_product_base in _get_ogp_products_base(ogp_api_products_response)
+    ]
+
+
+def get_ogp_product_cost_and_members(
+    ogp_api_product_info_response: str,
+) -> tuple[OgpProductCost, list[OgpApiProductMembersResponse]]:
+    """Parses a product page once for both its cost and its team"""
+    soup = get_soup(ogp_api_product_info_response)
+    product_members = [
+        OgpApiProductMembersResponse(
+            role="",
+            involvement=team_member.involvement,
+            staff=OgpApiStaffResponse(
+                id=get_staff_id(team_member.path),
+                name=team_member.default_name,
+                terminationDate=None,
+            ),
+        )
+        for team_member in _get_ogp_product_team_members(soup)
+    ]
+    return _get_ogp_product_cost(soup), product_members
+
+
+def get_ogp_api_all_repos_response() -> list[OgpRepo]:
+    return get_ogp_repos(get_ogp_api_products_response())
+
+
+def get_ogp_api_product_response(
+    path: str,
+) -> tuple[OgpProductCost, list[OgpApiProductMembersResponse]]:
+    return get_ogp_product_cost_and_members(get_ogp_api_product_info_response(path))
+
+
+def get_ogp_api_product_cost_response(path: str) -> OgpProductCost:
+    ogp_product_cost, _ = get_ogp_api_product_response(path)
+    return ogp_product_cost
+
+
+def get_ogp_api_product_members_response(
+    path: str,
+) -> list[OgpApiProductMembersResponse]:
+    _, product_members = get_ogp_api_product_response(path)
+    return product_members
+
+
+def get_people_url(staff_id: str) -> str:
+    return f"{OGP_BASE_URL}people/{staff_id}"
+
+
+def get_ogp_api_people_response(staff_id: str) -> str:
+    return get_ogp_api_people_info_response(get_people_url(staff_id))
+
+
+async def async_get_ogp_api_all_repos_response(
+    revalidate: bool = False,
+) -> list[OgpRepo]:
+    ogp_api_products_response = await async_get_ogp_api_products_response(
+        revalidate=revalidate
+    )
+    return await asyncio.to_thread(get_ogp_repos, ogp_api_products_response)
+
+
+async def async_get_ogp_api_product_response(
+    path: str, revalidate: bool = False
+) -> tuple[OgpProductCost, list[OgpApiProductMembersResponse]]:
+    ogp_api_product_info_response = await async_get_ogp_api_product_info_response(
+        path, revalidate
+    )
+    return await asyncio.to_thread(
+        get_ogp_product_cost_and_members, ogp_api_product_info_response
+    )
+
+
+async def async_get_ogp_api_people_response(
+    staff_id: str, revalidate: bool = False
+) -> str:
+    return await async_get_ogp_api_people_info_response(
+        get_people_url(staff_id), revalidate
+    )
@@ -0,0 +1,63 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, Iterator, TypeVar, Union
+
+from metrics import StageTiming, get_counters, get_stage_timings, merge, reset
+
+R = TypeVar("R")
+
+DEFAULT_PARSE_WORKERS = int(os.environ.get("OGP_PARSE_WORKERS", os.cpu_count() or 1))
+DEFAULT_PARSE_BATCH_SIZE = int(os.environ.get("OGP_PARSE_BATCH_SIZE", "8"))
+
+
+def _call(parse: Callable[..., R], args: tuple) -> Union[R, Exception]:
+    try:
+        return parse(*args)
+    except Exception as e:
+        return e
+
+
+def _call_in_worker(
+    parse: Callable[..., R], args: tuple
+) -> tuple[Union[R, Exception], dict[str, float], dict[str, StageTiming]]:
+    """_call in a worker process, alongside the counters and stage timings it
+    recorded there, which the parent process would not see otherwise"""
+    reset()
+    result = _call(parse, args)
+    counters = {counter: value for counter, value in get_counters().items() if value}
+    return result, counters, get_stage_timings()
+
+
+def imap_parse(
+    parse: Callable[..., R],
+    items: Iterable[tuple],
+    max_workers: int = DEFAULT_PARSE_WORKERS,
+    batch_size: int = DEFAULT_PARSE_BATCH_SIZE,
+) -> Iterator[Union[R, Exception]]:
+    """Applies parse to every argument tuple in a process pool, sending items to
+    the workers batch_size at a time. parse must be a module-level function and
+    should return plain tuples so results are cheap to pickle back. Results
+    are yielded in input order; a failing item yields its exception in place of
+    a result. Metrics recorded by parse in the workers are merged into this
+    process's as each result arrives"""
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        yield from (_call(parse, item) for item in items)
+        return
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        for result, counters, stage_timings in executor.map(
+            partial(_call_in_worker, parse), items, chunksize=max(batch_size, 1)
+        ):
+            merge(counters, stage_timings)
+            yield result
+
+
+def map_parse(
+    parse: Callable[..., R],
+    items: Iterable[tuple],
+    max_workers: int = DEFAULT_PARSE_WORKERS,
+    batch_size: int = DEFAULT_PARSE_BATCH_SIZE,
+) -> list[Union[R, Exception]]:
+    """Eager version of imap_parse"""
+    return list(imap_parse(parse, items, max_workers, batch_size))
@@ -1,8 +1,11 @@
-from typing import Optional
+import logging
+from typing import Iterable, Iterator, NamedTuple, Optional
 from unicodedata import numeric
 
 from bs4 import BeautifulSoup, NavigableString, Tag
+from pydantic import TypeAdapter
 
+from concurrency import DEFAULT_MAX_WORKERS, imap_concurrently
 from gateway import (
     CORPORATE_OVERHEAD_HTML_TAG,
     EQUIPMENT_SOFTWARE_AND_OFFICE_HTML_TAG,
@@ -14,6 +17,38 @@ from gateway import (
     get_ogp_api_products_response,
 )
 from models import OgpProduct, OgpProductBase, OgpProductCost, OgpProductTeamMember
+from parse_pool import DEFAULT_PARSE_BATCH_SIZE, DEFAULT_PARSE_WORKERS, imap_parse
+from soup import get_soup
+
+logger = logging.getLogger(__name__)
+
+
+class ProductFailure(NamedTuple):
+    path: str
+    error: Exception
+
+
+class IncompleteCrawlError(Exception):
+    """Some product pages could not be fetched or parsed, so solving the
+    remaining products would attribute their costs to the wrong people"""
+
+    def __init__(self, failures: list[ProductFailure]) -> None:
+        self.failures = failures
+        super().__init__(
+            f"{len(failures)} products failed: "
+            + ", ".join(failure.path for failure in failures)
+        )
+
+
+def _record_failure(
+    failures: Optional[list[ProductFailure]],
+    action: str,
+    ogp_product_base: OgpProductBase,
+    error: Exception,
+) -> None:
+    logger.warning("Failed to %s product %s: %r", action, ogp_product_base.path, error)
+    if failures is not None:
+        failures.append(ProductFailure(ogp_product_base.path, error))
 
 
 def _get_ogp_repo_tags(a_tags: list[Tag]) -> list[Tag]:
@@ -23,7 +58,7 @@ def _get_ogp_repo_tags(a_tags: list[Tag]) -> list[Tag]:
 def _get_ogp_products_base(ogp_api_products_response: str) -> list[OgpProductBase]:
     ogp_repos: list[OgpProductBase] = []
 
-    soup = BeautifulSoup(ogp_api_products_response, features="html.parser")
+    soup = get_soup(ogp_api_products_response)
     a_tags: list[Tag] = soup.find_all("a")
     ogp_repo_tags = _get_ogp_repo_tags(a_tags)
 
@@ -44,14 +79,16 @@ def _get_ogp_products_base(ogp_api_products_response: str) -> list[OgpProductBas
     return ogp_repos
 
 
-def _get_ogp_product_cost_component(
-    ogp_api_product_info_response_soup: BeautifulSoup, cost_component: str
-) -> float:
-    cost_component_tag = ogp_api_product_info_response_soup.find(
-        "div", string=cost_component
-    )
-    if cost_component_tag is None:
-        return 0
+COST_COMPONENT_FIELDS_BY_HTML_TAG = {
+    SALARY_HTML_TAG: "salary",
+    INFRASTRUCTURE_HTML_TAG: "infrastructure",
+    CORPORATE_OVERHEAD_HTML_TAG: "corporate_overhead",
+    EQUIPMENT_SOFTWARE_AND_OFFICE_HTML_TAG: "equipment_software_and_office",
+    OTHERS_HTML_TAG: "others",
+}
+
+
+def _get_ogp_product_cost_component(cost_component_tag: Tag) -> float:
     cost_component_number_tag = cost_component_tag.find_previous_sibling("div")
     if cost_component_number_tag is None:
         return 0
@@ -59,46 +96,89 @@ def _get_ogp_product_cost_component(
     return int(cost_component_html_value[1:].replace(",", ""))
 
 
-def _get_ogp_product_cost(ogp_api_product_info_response: str) -> OgpProductCost:
-    soup = BeautifulSoup(ogp_api_product_info_response, features="html.parser")
+def _get_ogp_product_cost_components(
+    ogp_api_product_info_response_soup: BeautifulSoup,
+) -> dict[str, float]:
+    """Collects every cost component label in a single traversal of the page"""
+    cost_components: dict[str, float] = {}
+    cost_component_tags = ogp_api_product_info_response_soup.find_all(
+        "div", string=list(COST_COMPONENT_FIELDS_BY_HTML_TAG)
+    )
+    for cost_component_tag in cost_component_tags:
+        field = COST_COMPONENT_FIELDS_BY_HTML_TAG[cost_component_tag.string]
+        if field in cost_components:
+            continue
+        cost_components[field] = _get_ogp_product_cost_component(cost_component_tag)
+
+    return {
+        field: cost_components.get(field, 0)
+        for field in COST_COMPONENT_FIELDS_BY_HTML_TAG.values()
+    }
+
+
+def _get_ogp_product_cost(
+    ogp_api_product_info_response_soup: BeautifulSoup,
+) -> OgpProductCost:
     return OgpProductCost(
-        salary=_get_ogp_product_cost_component(soup, SALARY_HTML_TAG),
-        infrastructure=_get_ogp_product_cost_component(soup, INFRASTRUCTURE_HTML_TAG),
-        corporate_overhead=_get_ogp_product_cost_component(
-            soup, CORPORATE_OVERHEAD_HTML_TAG
-        ),
-        equipment_software_and_office=_get_ogp_product_cost_component(
-            soup, EQUIPMENT_SOFTWARE_AND_OFFICE_HTML_TAG
-        ),
-        others=_get_ogp_product_cost_component(soup, OTHERS_HTML_TAG),
+        **_get_ogp_product_cost_components(ogp_api_product_info_response_soup)
     )
 
 
-def get_ogp_product_team_member(
+class _TeamMemberRecord(NamedTuple):
+    path: str
+    involvement: float
+    default_name: str
+
+
+_team_members_adapter = TypeAdapter(list[OgpProductTeamMember])
+
+
+def _get_team_member_record(
     ogp_product_member_tag: Tag,
-) -> Optional[OgpProductTeamMember]:
+) -> Optional[_TeamMemberRecord]:
     involvement_value = ogp_product_member_tag.find("img")
     if involvement_value is None:
         return None
     involvement_text = involvement_value["title"]
 
+    open_bracket_index = involvement_text.index("(")
     involvement = numeric(
-        involvement_text[involvement_text.index("(") + 1 : involvement_text.index(")")]
+        involvement_text[open_bracket_index + 1 : involvement_text.index(")")]
     )
-    default_name = involvement_text[0 : involvement_text.index("(") - 1]
+    default_name = involvement_text[0 : open_bracket_index - 1]
 
-    return OgpProductTeamMember(
+    return _TeamMemberRecord(
         path=ogp_product_member_tag["href"],
         involvement=involvement,
         default_name=default_name,
     )
 
 
-def _get_ogp_product_team_members(
-    ogp_api_product_info_response: str,
-) -> list[OgpProductTeamMember]:
-    soup = BeautifulSoup(ogp_api_product_info_response, features="html.parser")
-    team_members_title_tag = soup.find("h2", string="Team Members")
+def _iter_team_member_records(
+    ogp_product_member_tags: Iterable[Tag],
+) -> Iterator[_TeamMemberRecord]:
+    """Parses each anchor tag exactly once, skipping those without a team member"""
+    for ogp_product_member_tag in ogp_product_member_tags:
+        team_member_record = _get_team_member_record(ogp_product_member_tag)
+        if team_member_record is not None:
+            yield team_member_record
+
+
+def get_ogp_product_team_member(
+    ogp_product_member_tag: Tag,
+) -> Optional[OgpProductTeamMember]:
+    team_member_record = _get_team_member_record(ogp_product_member_tag)
+    if team_member_record is None:
+        return None
+    return OgpProductTeamMember(**team_member_record._asdict())
+
+
+def _get_ogp_product_team_member_tags(
+    ogp_api_product_info_response_soup: BeautifulSoup,
+) -> list[Tag]:
+    team_members_title_tag = ogp_api_product_info_response_soup.find(
+        "h2", string="Team Members"
+    )
     if team_members_title_tag is None:
         return []
     team_members_title_parent_tag = team_members_title_tag.find_parent("div")
@@ -112,21 +192,34 @@ def _get_ogp_product_team_members(
     team_members_data = team_members_data_tag.find_all("a")
     if isinstance(team_members_data, Tag):
         return []
+    return team_members_data
 
-    return [
-        get_ogp_product_team_member(team_member_data)
-        for team_member_data in team_members_data
-        if get_ogp_product_team_member(team_member_data) is not None
-    ]
+
+def _get_ogp_product_team_members(
+    ogp_api_product_info_response_soup: BeautifulSoup,
+) -> list[OgpProductTeamMember]:
+    team_members_data = _get_ogp_product_team_member_tags(
+        ogp_api_product_info_response_soup
+    )
+    return _team_members_adapter.validate_python(
+        list(_iter_team_member_records(team_members_data)), from_attributes=True
+    )
 
 
 def _get_ogp_product(ogp_product_base: OgpProductBase) -> OgpProduct:
     ogp_api_product_info_response = get_ogp_api_product_info_response(
         ogp_product_base.path
     )
+    return _parse_ogp_product(ogp_product_base, ogp_api_product_info_response)
 
-    product_team_members = _get_ogp_product_team_members(ogp_api_product_info_response)
-    cost = _get_ogp_product_cost(ogp_api_product_info_response)
+
+def _parse_ogp_product(
+    ogp_product_base: OgpProductBase, ogp_api_product_info_response: str
+) -> OgpProduct:
+    soup = get_soup(ogp_api_product_info_response)
+
+    product_team_members = _get_ogp_product_team_members(soup)
+    cost = _get_ogp_product_cost(soup)
     return OgpProduct(
         path=ogp_product_base.path,
         logoUrl=ogp_product_base.logoUrl,
@@ -136,9 +229,110 @@ def _get_ogp_product(ogp_product_base: OgpProductBase) -> OgpProduct:
     )
 
 
-def get_ogp_products() -> list[OgpProduct]:
+OgpProductValues = tuple[tuple[float, ...], tuple[tuple[str, float, str], ...]]
+
+
+def get_ogp_product_values(ogp_api_product_info_response: str) -> OgpProductValues:
+    """Cost components, in COST_COMPONENT_FIELDS_BY_HTML_TAG order, and
+    (path, involvement, default_name) per team member as plain, picklable
+    tuples"""
+    soup = get_soup(ogp_api_product_info_response)
+    cost_components = _get_ogp_product_cost_components(soup)
+    team_member_tags = _get_ogp_product_team_member_tags(soup)
+    return (
+        tuple(
+            cost_components[field]
+            for field in COST_COMPONENT_FIELDS_BY_HTML_TAG.values()
+        ),
+        tuple(tuple(i) for i in _iter_team_member_records(team_member_tags)),
+    )
+
+
+def _get_ogp_product_from_values(
+    ogp_product_base: OgpProductBase, ogp_product_values: OgpProductValues
+) -> OgpProduct:
+    cost_components, team_member_records = ogp_product_values
+    return OgpProduct(
+        path=ogp_product_base.path,
+        logoUrl=ogp_product_base.logoUrl,
+        name=ogp_product_base.name,
+        cost=OgpProductCost(
+            **dict(zip(COST_COMPONENT_FIELDS_BY_HTML_TAG.values(), cost_components))
+        ),
+        team_members=_team_members_adapter.validate_python(
+            [_TeamMemberRecord(*i) for i in team_member_records],
+            from_attributes=True,
+        ),
+    )
+
+
+def iter_ogp_products_with_parse_pool(
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    parse_workers: int = DEFAULT_PARSE_WORKERS,
+    parse_batch_size: int = DEFAULT_PARSE_BATCH_SIZE,
+    failures: Optional[list[ProductFailure]] = None,
+) -> Iterator[OgpProduct]:
+    """Two stage version of iter_ogp_products: every product page is first
+    downloaded with up to max_workers concurrent requests, then the raw HTML is
+    parsed across parse_workers processes, parse_batch_size pages at a time.
+    Failed products are logged, skipped and appended to failures"""
     ogp_api_products_response = get_ogp_api_products_response()
     ogp_products_base = _get_ogp_products_base(ogp_api_products_response)
-    return [
-        _get_ogp_product(ogp_product_base) for ogp_product_base in ogp_products_base
-    ]
+    ogp_api_product_info_responses = imap_concurrently(
+        lambda ogp_product_base: get_ogp_api_product_info_response(
+            ogp_product_base.path
+        ),
+        ogp_products_base,
+        max_workers,
+    )
+
+    fetched: list[tuple[OgpProductBase, str]] = []
+    for ogp_product_base, result in zip(
+        ogp_products_base, ogp_api_product_info_responses
+    ):
+        if isinstance(result, Exception):
+            _record_failure(failures, "fetch", ogp_product_base, result)
+            continue
+        fetched.append((ogp_product_base, result))
+
+    ogp_products_values = imap_parse(
+        get_ogp_product_values,
+        ((html,) for _, html in fetched),
+        parse_workers,
+        parse_batch_size,
+    )
+    for (ogp_product_base, _), result in zip(fetched, ogp_products_values):
+        if isinstance(result, Exception):
+            _record_failure(failures, "parse", ogp_product_base, result)
+            continue
+        yield _get_ogp_product_from_values(ogp_product_base, result)
+
+
+def iter_ogp_products(
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    failures: Optional[list[ProductFailure]] = None,
+) -> Iterator[OgpProduct]:
+    """Fetches every product page with up to max_workers concurrent requests.
+    Products are yielded in listing order as soon as they are parsed; failed
+    products are logged, skipped and appended to failures"""
+    ogp_api_products_response = get_ogp_api_products_response()
+    ogp_products_base = _get_ogp_products_base(ogp_api_products_response)
+    results = imap_concurrently(_get_ogp_product, ogp_products_base, max_workers)
+
+    for ogp_product_base, result in zip(ogp_products_base, results):
+        if isinstance(result, Exception):
+            _record_failure(failures, "fetch", ogp_product_base, result)
+            continue
+        yield result
+
+
+def get_ogp_products(
+    max_workers: int = DEFAULT_MAX_WORKERS, allow_partial: bool = False
+) -> list[OgpProduct]:
+    """Every product on the listing. Raises IncompleteCrawlError if any product
+    failed, unless allow_partial is set"""
+    failures: list[ProductFailure] = []
+    ogp_products = list(iter_ogp_products(max_workers, failures))
+    if failures and not allow_partial:
+        raise IncompleteCrawlError(failures)
+    return ogp_products
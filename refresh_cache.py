@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class _BaseRefreshingCache(Generic[T]):
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.refreshed_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._value: Optional[T] = None
+
+    def get_age_seconds(self) -> Optional[float]:
+        if self.refreshed_at is None:
+            return None
+        return time.time() - self.refreshed_at
+
+    def is_stale(self) -> bool:
+        age_seconds = self.get_age_seconds()
+        return age_seconds is None or age_seconds >= self.ttl_seconds
+
+    def _set_value(self, value: T) -> None:
+        self._value = value
+        self.refreshed_at = time.time()
+        self.last_error = None
+
+    def _set_error(self, error: Exception) -> None:
+        logger.exception("Cache refresh failed", exc_info=error)
+        self.last_error = repr(error)
+
+
+class AsyncRefreshingCache(_BaseRefreshingCache[T]):
+    """
+    Holds the last good result of an expensive computation.
+    Once older than ttl_seconds the stale value is still served while a single
+    background task recomputes it. A failed refresh keeps the previous value.
+    Every caller that asks for a refresh while one is in flight awaits that same
+    task, so concurrent requests coalesce into a single computation
+    """
+
+    def __init__(self, compute: Callable[[], Awaitable[T]], ttl_seconds: float) -> None:
+        super().__init__(ttl_seconds)
+        self.compute = compute
+        self._refresh_task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def is_refreshing(self) -> bool:
+        return self._refresh_task is not None and not self._refresh_task.done()
+
+    async def _refresh(self) -> None:
+        try:
+            self._set_value(await self.compute())
+        except Exception as e:
+            self._set_error(e)
+
+    def refresh_in_background(self) -> bool:
+        """Starts a refresh task unless one is already in flight"""
+        if self.is_refreshing:
+            return False
+        self._refresh_task = asyncio.create_task(self._refresh())
+        return True
+
+    async def refresh(self) -> Optional[T]:
+        """Recomputes the value, or joins the in-flight refresh"""
+        self.refresh_in_background()
+        assert self._refresh_task is not None
+        await asyncio.shield(self._refresh_task)
+        return self._value
+
+    async def get(self) -> Optional[T]:
+        """Returns the cached value, waiting only until the first one exists"""
+        if self._value is None:
+            return await self.refresh()
+        if self.is_stale():
+            self.refresh_in_background()
+        return self._value
@@ -0,0 +1,81 @@
+"""
+What-if analyses solved as one batch.
+
+Scenarios that share a contribution matrix (the same involvement cap) are
+solved together against a single factorisation, one right-hand side each.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from contribution import (
+    MONTHS_IN_QUARTER,
+    _get_current_product_contribution_matrix,
+    _get_yearly_salary,
+    _iter_contributions,
+)
+from solver import issparse, solve_least_squares_many
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    # Fraction of each product's salary cost attributed to its team, e.g. 0.7
+    cost_scale: float = 1.0
+    # Upper bound applied to every involvement, e.g. 0.5
+    involvement_cap: Optional[float] = None
+    months_in_quarter: int = MONTHS_IN_QUARTER
+
+
+@dataclass
+class ScenarioResult:
+    scenario_names: list[str]
+    team_member_names: np.ndarray
+    yearly_salaries: np.ndarray  # One row per scenario, one column per person
+
+
+def _get_capped_matrix(matrix, involvement_cap: Optional[float]):
+    if involvement_cap is None:
+        return matrix
+    if issparse(matrix):
+        return matrix.minimum(involvement_cap)
+    return np.minimum(matrix, involvement_cap)
+
+
+def solve_scenarios(scenarios: list[Scenario], use_api: bool = False) -> ScenarioResult:
+    product_contribution_matrix = _get_current_product_contribution_matrix(
+        _iter_contributions(use_api)
+    )
+    quarterly_product_costs = product_contribution_matrix.quarterly_product_costs
+    yearly_salaries = np.empty(
+        (len(scenarios), len(product_contribution_matrix.team_member_names))
+    )
+
+    scenario_indices_by_cap: dict[Optional[float], list[int]] = {}
+    for i, scenario in enumerate(scenarios):
+        scenario_indices_by_cap.setdefault(scenario.involvement_cap, []).append(i)
+
+    for involvement_cap, scenario_indices in scenario_indices_by_cap.items():
+        cost_columns = np.column_stack(
+            [
+                quarterly_product_costs * scenarios[i].cost_scale
+                for i in scenario_indices
+            ]
+        )
+        quarterly_salaries = solve_least_squares_many(
+            _get_capped_matrix(product_contribution_matrix.matrix, involvement_cap),
+            cost_columns,
+        )
+        for column, i in enumerate(scenario_indices):
+            yearly_salaries[i] = _get_yearly_salary(
+                quarterly_salaries[:, column],
+                months_in_quarter=scenarios[i].months_in_quarter,
+            )
+
+    return ScenarioResult(
+        scenario_names=[scenario.name for scenario in scenarios],
+        team_member_names=product_contribution_matrix.team_member_names,
+        yearly_salaries=yearly_salaries,
+    )
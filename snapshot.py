@@ -0,0 +1,103 @@
+import asyncio
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Mapping, Sequence, TypeVar, Union
+
+from concurrency import DEFAULT_MAX_WORKERS, map_concurrently
+from models import OgpApiProductMembersResponse, OgpRepo
+from ogp_api import (
+    async_get_ogp_api_all_repos_response,
+    async_get_ogp_api_people_response,
+    async_get_ogp_api_product_response,
+    get_ogp_api_all_repos_response,
+    get_ogp_api_people_response,
+    get_ogp_api_product_response,
+)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class OgpSnapshot:
+    """
+    Everything the salary pipeline needs from OGP, fetched once per refresh.
+    product_costs and product_members are aligned with repos
+    """
+
+    repos: tuple[OgpRepo, ...]
+    product_costs: tuple[float, ...]
+    product_members: tuple[tuple[OgpApiProductMembersResponse, ...], ...]
+    people_responses: Mapping[str, str]  # Staff id to people page HTML
+
+
+def _raise_first_error(results: Sequence[Union[T, Exception]]) -> list[T]:
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return list(results)  # type: ignore[arg-type]
+
+
+def get_ogp_snapshot(max_workers: int = DEFAULT_MAX_WORKERS) -> OgpSnapshot:
+    repos = get_ogp_api_all_repos_response()
+    product_responses = _raise_first_error(
+        map_concurrently(
+            lambda repo: get_ogp_api_product_response(repo.path), repos, max_workers
+        )
+    )
+
+    staff_ids = list(
+        dict.fromkeys(
+            member.staff.id for _, members in product_responses for member in members
+        )
+    )
+    people_responses = _raise_first_error(
+        map_concurrently(get_ogp_api_people_response, staff_ids, max_workers)
+    )
+
+    return OgpSnapshot(
+        repos=tuple(repos),
+        product_costs=tuple(cost.salary for cost, _ in product_responses),
+        product_members=tuple(tuple(members) for _, members in product_responses),
+        people_responses=MappingProxyType(dict(zip(staff_ids, people_responses))),
+    )
+
+
+async def async_get_ogp_snapshot(
+    max_concurrency: int = DEFAULT_MAX_WORKERS, revalidate: bool = False
+) -> OgpSnapshot:
+    """Event loop counterpart of get_ogp_snapshot, gathering every product and
+    person concurrently behind one semaphore. Pages are fetched through the
+    async gateway; only parsing runs in worker threads. revalidate asks OGP
+    about every cached page, even one still fresh in the response cache"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _call(fn: Callable[..., Awaitable[T]], *args: Any) -> T:
+        async with semaphore:
+            return await fn(*args)
+
+    repos = await _call(async_get_ogp_api_all_repos_response, revalidate)
+    product_responses = await asyncio.gather(
+        *(
+            _call(async_get_ogp_api_product_response, repo.path, revalidate)
+            for repo in repos
+        )
+    )
+
+    staff_ids = list(
+        dict.fromkeys(
+            member.staff.id for _, members in product_responses for member in members
+        )
+    )
+    people_responses = await asyncio.gather(
+        *(
+            _call(async_get_ogp_api_people_response, staff_id, revalidate)
+            for staff_id in staff_ids
+        )
+    )
+
+    return OgpSnapshot(
+        repos=tuple(repos),
+        product_costs=tuple(cost.salary for cost, _ in product_responses),
+        product_members=tuple(tuple(members) for _, members in product_responses),
+        people_responses=MappingProxyType(dict(zip(staff_ids, people_responses))),
+    )
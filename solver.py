@@ -0,0 +1,203 @@
+import logging
+import time
+from dataclasses import dataclass
+from importlib.util import find_spec
+from typing import Any, Callable, NamedTuple, Optional
+
+import numpy as np
+
+from metrics import SOLVE_STAGE, timed
+
+DENSE_BACKEND = "dense"
+LSQR_BACKEND = "lsqr"
+LSMR_BACKEND = "lsmr"
+NNLS_BACKEND = "nnls"
+
+# Systems with more cells than this are stored sparsely and solved iteratively
+DENSE_MAX_CELLS = 2_000 * 2_000
+ITERATIVE_TOLERANCE = 1e-10
+# LSQR and LSMR give up after this many times min(shape) iterations, and never
+# before ITERATIVE_MIN_MAX_ITERATIONS. scipy's own LSMR limit of min(shape)
+# stops short of convergence even on data.json
+ITERATIVE_MAX_ITERATIONS_FACTOR = 10
+ITERATIVE_MIN_MAX_ITERATIONS = 1_000
+# LSQR and LSMR istop codes for a solution within the tolerances
+ITERATIVE_CONVERGED_ISTOPS = frozenset({0, 1, 2, 4, 5})
+
+# scipy is only imported once a sparse matrix or iterative backend is needed,
+# which keeps it out of the start-up time of small dense solves
+HAS_SCIPY = find_spec("scipy") is not None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LeastSquaresSolution:
+    x: np.ndarray
+    residual_norm: float
+    rank: Optional[int]  # Only known for the dense backend
+    iterations: Optional[int]  # Only known for the iterative backends
+    istop: Optional[int]  # Stop reason of LSQR / LSMR, or lsq_linear's status
+    converged: bool
+    backend: str
+    seconds: float
+
+
+class _BackendSolution(NamedTuple):
+    x: np.ndarray
+    rank: Optional[int]
+    iterations: Optional[int]
+    istop: Optional[int]
+    converged: bool
+
+
+def is_large_system(shape: tuple[int, int]) -> bool:
+    return HAS_SCIPY and shape[0] * shape[1] > DENSE_MAX_CELLS
+
+
+def issparse(matrix: Any) -> bool:
+    """scipy.sparse.issparse without importing scipy for dense arrays"""
+    if not type(matrix).__module__.startswith("scipy.sparse"):
+        return False
+    from scipy import sparse
+
+    return sparse.issparse(matrix)
+
+
+def _get_residual_norm(matrix: Any, x: np.ndarray, b: np.ndarray) -> float:
+    return float(np.linalg.norm(matrix @ x - b))
+
+
+def _get_max_iterations(shape: tuple[int, int]) -> int:
+    return max(
+        ITERATIVE_MIN_MAX_ITERATIONS, ITERATIVE_MAX_ITERATIONS_FACTOR * min(shape)
+    )
+
+
+def _solve_dense(matrix: Any, b: np.ndarray) -> _BackendSolution:
+    if issparse(matrix):
+        matrix = matrix.toarray()
+    x, _, rank, _ = np.linalg.lstsq(matrix, b, rcond=None)
+    return _BackendSolution(x, int(rank), None, None, True)
+
+
+def _solve_lsqr(matrix: Any, b: np.ndarray) -> _BackendSolution:
+    from scipy.sparse.linalg import lsqr
+
+    x, istop, iterations, *_ = lsqr(
+        matrix,
+        b,
+        atol=ITERATIVE_TOLERANCE,
+        btol=ITERATIVE_TOLERANCE,
+        iter_lim=_get_max_iterations(matrix.shape),
+    )
+    return _BackendSolution(
+        x, None, int(iterations), int(istop), istop in ITERATIVE_CONVERGED_ISTOPS
+    )
+
+
+def _solve_lsmr(matrix: Any, b: np.ndarray) -> _BackendSolution:
+    from scipy.sparse.linalg import lsmr
+
+    x, istop, iterations, *_ = lsmr(
+        matrix,
+        b,
+        atol=ITERATIVE_TOLERANCE,
+        btol=ITERATIVE_TOLERANCE,
+        maxiter=_get_max_iterations(matrix.shape),
+    )
+    return _BackendSolution(
+        x, None, int(iterations), int(istop), istop in ITERATIVE_CONVERGED_ISTOPS
+    )
+
+
+def _solve_nnls(matrix: Any, b: np.ndarray) -> _BackendSolution:
+    """Least squares constrained to non-negative costs"""
+    from scipy.optimize import lsq_linear
+
+    result = lsq_linear(
+        matrix,
+        b,
+        bounds=(0, np.inf),
+        lsq_solver="lsmr" if issparse(matrix) else "exact",
+    )
+    # status is -1 on bad input, 0 at the iteration limit and 1 to 3 once a
+    # convergence test passes
+    return _BackendSolution(
+        result.x, None, int(result.nit), int(result.status), result.status > 0
+    )
+
+
+SOLVER_BACKENDS: dict[str, Callable[[Any, np.ndarray], _BackendSolution]] = {
+    DENSE_BACKEND: _solve_dense,
+    LSQR_BACKEND: _solve_lsqr,
+    LSMR_BACKEND: _solve_lsmr,
+    NNLS_BACKEND: _solve_nnls,
+}
+
+
+def _get_default_backend(matrix: Any) -> str:
+    if not HAS_SCIPY:
+        return DENSE_BACKEND
+    if issparse(matrix) or is_large_system(matrix.shape):
+        return LSMR_BACKEND
+    return DENSE_BACKEND
+
+
+def solve_least_squares(
+    matrix: Any, b: Any, backend: Optional[str] = None
+) -> LeastSquaresSolution:
+    """
+    Solves min ||matrix @ x - b|| for a dense array or scipy.sparse matrix.
+    Without an explicit backend, small systems use dense np.linalg.lstsq and
+    large or sparse ones use LSMR. Both return the minimum-norm solution.
+    An iterative backend that stops before converging is logged, and reported
+    in the solution's converged and istop
+    """
+    if not issparse(matrix):
+        matrix = np.asarray(matrix, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+
+    if backend is None:
+        backend = _get_default_backend(matrix)
+    if backend not in SOLVER_BACKENDS:
+        raise ValueError(f"Unknown least squares backend: {backend}")
+    if backend != DENSE_BACKEND and not HAS_SCIPY:
+        raise ImportError(f"scipy is required for the {backend} backend")
+
+    start = time.perf_counter()
+    with timed(SOLVE_STAGE):
+        solution = SOLVER_BACKENDS[backend](matrix, b)
+    seconds = time.perf_counter() - start
+    if not solution.converged:
+        logger.warning(
+            "%s stopped without converging after %s iterations (istop %s)",
+            backend,
+            solution.iterations,
+            solution.istop,
+        )
+
+    return LeastSquaresSolution(
+        x=solution.x,
+        residual_norm=_get_residual_norm(matrix, solution.x, b),
+        rank=solution.rank,
+        iterations=solution.iterations,
+        istop=solution.istop,
+        converged=solution.converged,
+        backend=backend,
+        seconds=seconds,
+    )
+
+
+def solve_least_squares_many(matrix: Any, b_columns: Any) -> np.ndarray:
+    """
+    Minimum-norm least squares solutions for every column of b_columns.
+    Dense matrices are factorised once with an SVD (np.linalg.pinv) that is
+    reused for every right-hand side; sparse ones are solved column by column
+    with LSMR. Returns an array of shape (matrix columns, b_columns columns)
+    """
+    b_columns = np.asarray(b_columns, dtype=np.float64)
+    with timed(SOLVE_STAGE):
+        if issparse(matrix):
+            return np.column_stack([_solve_lsmr(matrix, b).x for b in b_columns.T])
+        return np.linalg.pinv(np.asarray(matrix, dtype=np.float64)) @ b_columns
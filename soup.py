@@ -0,0 +1,16 @@
+import os
+
+from bs4 import BeautifulSoup
+
+from metrics import PARSE_BYTES, PARSE_CALLS, PARSE_STAGE, increment, timed
+
+# lxml is faster but repairs malformed markup differently, so it is opt-in
+HTML_PARSER = os.environ.get("OGP_HTML_PARSER", "html.parser")
+
+
+def get_soup(html: str, features: str = HTML_PARSER) -> BeautifulSoup:
+    """Parses html with html.parser, or the parser named by OGP_HTML_PARSER"""
+    increment(PARSE_CALLS)
+    increment(PARSE_BYTES, len(html))
+    with timed(PARSE_STAGE):
+        return BeautifulSoup(html, features=features)
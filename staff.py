@@ -4,17 +4,19 @@ from typing import Any, Optional
 
 from bs4 import BeautifulSoup
 
-from gateway import (
-    get_ogp_api_all_repos_response,
-    get_ogp_api_people_response,
-    get_ogp_api_product_cost_response,
-    get_ogp_api_product_members_response,
-)
-from models import OgpRepo
+from models import OgpApiProductMembersResponse, OgpRepo
+from parse_pool import DEFAULT_PARSE_BATCH_SIZE, map_parse
+from snapshot import OgpSnapshot
+from soup import get_soup
+
+
+OGP_HEADSHOTS_BASEURL = "https://www.open.gov.sg/images/headshots/"
 
 
 @dataclass
 class Product:
+    __slots__ = ("name", "logo_url", "role", "involvement", "cost")
+
     name: str
     logo_url: str
     role: str
@@ -24,6 +26,8 @@ class Product:
 
 @dataclass
 class ProductStaff:
+    __slots__ = ("id", "name", "termination_date", "product")
+
     id: str
     name: str
     termination_date: Any
@@ -32,35 +36,45 @@ class ProductStaff:
 
 @dataclass
 class Staff:
+    __slots__ = (
+        "id",
+        "name",
+        "product",
+        "title",
+        "start_date",
+        "termination_date",
+        "headshot_url",
+    )
+
     id: str
     name: str
     product: list[Product]
-    title: Optional[str] = None
-    start_date: Optional[date] = None
-    termination_date: Optional[date] = None
-
-    OGP_HEADSHOTS_BASEURL: str = "https://www.open.gov.sg/images/headshots/"
-    headshot_url: str = ""
+    title: Optional[str]
+    start_date: Optional[date]
+    termination_date: Optional[date]
+    headshot_url: str
 
     def __post_init__(self) -> None:
-        self.headshot_url = f"{self.OGP_HEADSHOTS_BASEURL}{self.id}.jpg"
+        if not self.headshot_url:
+            self.headshot_url = f"{OGP_HEADSHOTS_BASEURL}{self.id}.jpg"
+
+
+@dataclass
+class StaffProfile:
+    title: Optional[str]
+    start_date: Optional[date]
+    headshot_url: str
 
 
 def _get_product_staff(
     ogp_api_repo_response: OgpRepo,
+    ogp_product_cost: float,
+    ogp_product_members: tuple[OgpApiProductMembersResponse, ...],
 ) -> list[ProductStaff]:
     """Returns a list of staff members for a given product"""
     ogp_product_name = ogp_api_repo_response.name
     ogp_product_logo_url = ogp_api_repo_response.logoUrl
 
-    ogp_product_cost_response = get_ogp_api_product_cost_response(
-        ogp_api_repo_response.path
-    )
-    ogp_product_cost = ogp_product_cost_response.salary
-
-    ogp_product_members = get_ogp_api_product_members_response(
-        ogp_api_repo_response.path
-    )
     product_staff: list[ProductStaff] = []
 
     for ogp_product_member in ogp_product_members:
@@ -80,31 +94,38 @@ def _get_product_staff(
     return product_staff
 
 
-def _get_all_products_staff() -> list[ProductStaff]:
+def _get_all_products_staff(ogp_snapshot: OgpSnapshot) -> list[ProductStaff]:
     """Returns a list of all staff members for all products"""
     all_products_staff: list[ProductStaff] = []
-    all_ogp_repos_response = get_ogp_api_all_repos_response()
-    for ogp_repo_response in all_ogp_repos_response:
-        product_staff = _get_product_staff(ogp_repo_response)
-        all_products_staff = [*all_products_staff, *product_staff]
+    for ogp_repo_response, ogp_product_cost, ogp_product_members in zip(
+        ogp_snapshot.repos, ogp_snapshot.product_costs, ogp_snapshot.product_members
+    ):
+        product_staff = _get_product_staff(
+            ogp_repo_response, ogp_product_cost, ogp_product_members
+        )
+        all_products_staff.extend(product_staff)
     return all_products_staff
 
 
-def _get_all_staff_ids(all_products_staff: list[ProductStaff]) -> set[str]:
-    all_staff_ids: set[str] = set()
+def _get_product_staff_by_staff_id(
+    all_products_staff: list[ProductStaff],
+) -> dict[str, list[ProductStaff]]:
+    """Groups product staff rows by staff id in a single pass"""
+    product_staff_by_staff_id: dict[str, list[ProductStaff]] = {}
     for product_staff in all_products_staff:
-        if product_staff.id in all_staff_ids:
-            continue
-        all_staff_ids.add(product_staff.id)
-    return all_staff_ids
+        product_staff_by_staff_id.setdefault(product_staff.id, []).append(product_staff)
+    return product_staff_by_staff_id
 
 
-def _get_staff_start_date(name: str) -> Optional[date]:
-    ogp_api_people_response = get_ogp_api_people_response(name)
-    soup = BeautifulSoup(ogp_api_people_response, "html.parser")
+def _get_staff_start_date(
+    ogp_api_people_response_soup: BeautifulSoup,
+) -> Optional[date]:
     try:
         staff_date_of_hire = (
-            soup.select(".content")[0].find("p").find("strong").text.strip()
+            ogp_api_people_response_soup.select(".content")[0]
+            .find("p")
+            .find("strong")
+            .text.strip()
         )
     except Exception:  # No Staff data found, typically because staff left
         return None
@@ -112,15 +133,69 @@ def _get_staff_start_date(name: str) -> Optional[date]:
     return datetime.strptime(staff_date_of_hire, "%B %d, %Y")
 
 
-def _get_staff_job_title(id: str) -> Optional[str]:
-    ogp_api_people_response = get_ogp_api_people_response(id)
-    soup = BeautifulSoup(ogp_api_people_response, "html.parser")
+def _get_staff_job_title(
+    ogp_api_people_response_soup: BeautifulSoup,
+) -> Optional[str]:
     try:
-        return soup.select(".staff-title")[-1].text.strip()
+        return ogp_api_people_response_soup.select(".staff-title")[-1].text.strip()
     except Exception:  # No Staff data found, typically because staff left
         return None
 
 
+def get_staff_profile_values(
+    ogp_api_people_response: str,
+) -> tuple[Optional[str], Optional[date]]:
+    """Job title and start date as a plain, picklable tuple"""
+    soup = get_soup(ogp_api_people_response)
+    return _get_staff_job_title(soup), _get_staff_start_date(soup)
+
+
+def _get_staff_profile(staff_id: str, ogp_api_people_response: str) -> StaffProfile:
+    """Parses a people page once for everything the staff record needs"""
+    title, start_date = get_staff_profile_values(ogp_api_people_response)
+    return StaffProfile(
+        title=title,
+        start_date=start_date,
+        headshot_url=f"{OGP_HEADSHOTS_BASEURL}{staff_id}.jpg",
+    )
+
+
+def get_staff_profiles(
+    ogp_snapshot: OgpSnapshot,
+    parse_workers: Optional[int] = None,
+    parse_batch_size: int = DEFAULT_PARSE_BATCH_SIZE,
+) -> dict[str, StaffProfile]:
+    """Parses every people page in the snapshot. Parsing is CPU bound and holds
+    the GIL, so pages are parsed serially unless parse_workers is set, in which
+    case they are parsed in a process pool, parse_batch_size pages at a time"""
+    people_responses = list(ogp_snapshot.people_responses.items())
+    if parse_workers is not None:
+        staff_profiles_values = map_parse(
+            get_staff_profile_values,
+            ((people_response,) for _, people_response in people_responses),
+            parse_workers,
+            parse_batch_size,
+        )
+        for staff_profile_values in staff_profiles_values:
+            if isinstance(staff_profile_values, Exception):
+                raise staff_profile_values
+        return {
+            staff_id: StaffProfile(
+                title=title,
+                start_date=start_date,
+                headshot_url=f"{OGP_HEADSHOTS_BASEURL}{staff_id}.jpg",
+            )
+            for (staff_id, _), (title, start_date) in zip(
+                people_responses, staff_profiles_values
+            )
+        }
+
+    return {
+        staff_id: _get_staff_profile(staff_id, people_response)
+        for staff_id, people_response in people_responses
+    }
+
+
 def _get_staff_termination_date(termination_date: Optional[str]) -> Optional[date]:
     if termination_date is None:
         return None
@@ -128,25 +203,31 @@ def _get_staff_termination_date(termination_date: Optional[str]) -> Optional[dat
 
 
 def _get_staff_data(
-    staff_id: str, all_staff_data_by_product: list[ProductStaff]
+    staff: list[ProductStaff], staff_profiles: dict[str, StaffProfile]
 ) -> Staff:
     """Returns a staff object containing all products worked on by said staff"""
-    staff = [
-        product_staff
-        for product_staff in all_staff_data_by_product
-        if product_staff.id == staff_id
-    ]
+    staff_profile = staff_profiles[staff[0].id]
     return Staff(
         id=staff[0].id,
         name=staff[0].name,
         product=[i.product for i in staff],
-        title=_get_staff_job_title(staff[0].id),
-        start_date=_get_staff_start_date(staff[0].id),
+        title=staff_profile.title,
+        start_date=staff_profile.start_date,
         termination_date=_get_staff_termination_date(staff[0].termination_date),
+        headshot_url=staff_profile.headshot_url,
     )
 
 
-def get_all_staff_data() -> list[Staff]:
-    all_staff_data_by_product = _get_all_products_staff()
-    staff_ids = _get_all_staff_ids(all_staff_data_by_product)
-    return [_get_staff_data(i, all_staff_data_by_product) for i in staff_ids]
+def get_all_staff_data(
+    ogp_snapshot: OgpSnapshot, parse_workers: Optional[int] = None
+) -> list[Staff]:
+    """parse_workers is passed on to get_staff_profiles"""
+    all_staff_data_by_product = _get_all_products_staff(ogp_snapshot)
+    product_staff_by_staff_id = _get_product_staff_by_staff_id(
+        all_staff_data_by_product
+    )
+    staff_profiles = get_staff_profiles(ogp_snapshot, parse_workers)
+    return [
+        _get_staff_data(staff, staff_profiles)
+        for staff in product_staff_by_staff_id.values()
+    ]
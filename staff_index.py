@@ -0,0 +1,58 @@
+import json
+from datetime import date
+from typing import Any, Callable, Iterator, Optional
+
+from models import StaffResponse
+
+SORT_KEYS: dict[str, Callable[[StaffResponse], Any]] = {
+    "salary": lambda staff: staff.salary,
+    "name": lambda staff: staff.name.lower(),
+    "start_date": lambda staff: (
+        staff.start_date is None,
+        staff.start_date or date.min,
+    ),
+}
+
+
+class StaffResponseIndex:
+    """
+    A refreshed list[StaffResponse] with every sort order and a product lookup
+    computed once, so queries only filter, slice and serialise the page asked for
+    """
+
+    def __init__(self, staff_response: list[StaffResponse]) -> None:
+        self.staff_response = staff_response
+        self.orders = {
+            sort_key: sorted(
+                range(len(staff_response)), key=lambda i: get_key(staff_response[i])
+            )
+            for sort_key, get_key in SORT_KEYS.items()
+        }
+        self.indices_by_product: dict[str, set[int]] = {}
+        for i, staff in enumerate(staff_response):
+            for product in staff.product:
+                self.indices_by_product.setdefault(product.name, set()).add(i)
+
+    def iter_staff(
+        self,
+        sort: str = "salary",
+        descending: bool = True,
+        title: Optional[str] = None,
+        product: Optional[str] = None,
+    ) -> Iterator[StaffResponse]:
+        order = self.orders[sort]
+        product_indices = (
+            self.indices_by_product.get(product, set()) if product is not None else None
+        )
+        title = title.lower() if title is not None else None
+        for i in reversed(order) if descending else order:
+            if product_indices is not None and i not in product_indices:
+                continue
+            staff = self.staff_response[i]
+            if title is not None and title not in (staff.title or "").lower():
+                continue
+            yield staff
+
+
+def get_staff_json(staff: StaffResponse, fields: Optional[set[str]] = None) -> str:
+    return json.dumps(staff.model_dump(mode="json", include=fields))
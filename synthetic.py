@@ -0,0 +1,163 @@
+import argparse
+import hashlib
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from gateway import (
+    CORPORATE_OVERHEAD_HTML_TAG,
+    EQUIPMENT_SOFTWARE_AND_OFFICE_HTML_TAG,
+    INFRASTRUCTURE_HTML_TAG,
+    OGP_BASE_URL,
+    OGP_PRODUCTS_URL,
+    OTHERS_HTML_TAG,
+    SALARY_HTML_TAG,
+)
+from http_cache import CachedResponse, ResponseCache
+
+DEFAULT_MEMBERS_PER_PRODUCT = 8
+INVOLVEMENT_BY_FRACTION = {"¼": 0.25, "½": 0.5, "¾": 0.75, "1": 1.0}
+MIN_YEARLY_SALARY = 60_000
+MAX_YEARLY_SALARY = 250_000
+
+
+@dataclass
+class SyntheticSite:
+    """Pages laid out like products.open.gov.sg and open.gov.sg/people, keyed by
+    URL, and the yearly salaries the product costs were derived from"""
+
+    pages: dict[str, str]
+    yearly_salaries: dict[str, float]
+
+
+def _get_products_page(product_names: list[str]) -> str:
+    # The product listing is read from the second anchor to the fifth last
+    product_tags = "".join(
+        f'<a href="/{name}"><img src="/logos/{name}.png"></a>' for name in product_names
+    )
+    footer_tags = "".join(f'<a href="/footer-{i}">Footer</a>' for i in range(4))
+    return f'<html><body><a href="/">Home</a>{product_tags}{footer_tags}</body></html>'
+
+
+def _get_product_page(
+    product_name: str, costs: dict[str, float], team_members: list[tuple[str, str]]
+) -> str:
+    cost_tags = "".join(
+        f"<div><div>${cost:,.0f}</div><div>{html_tag}</div></div>"
+        for html_tag, cost in costs.items()
+    )
+    team_member_tags = "".join(
+        f'<a href="{url}"><img title="{name} ({fraction})"></a>'
+        for url, name, fraction in team_members
+    )
+    return (
+        f"<html><body><h1>{product_name}</h1>{cost_tags}"
+        f"<div><h2>Team Members</h2></div><div>{team_member_tags}</div>"
+        "</body></html>"
+    )
+
+
+def _get_people_page(person_id: str, name: str, title: str, join_date: date) -> str:
+    return (
+        "<html><body>"
+        f'<div class="staff-pic" style="background-image: '
+        f'url(/images/people/{person_id}.jpg)"></div>'
+        f'<div class="staff-name">{name}</div>'
+        f'<div class="staff-title">{title}</div>'
+        '<div class="staff-heading">About</div>'
+        f'<div class="content"><p>Joined OGP on '
+        f"<strong>{join_date:%B %d, %Y}</strong></p></div>"
+        "</body></html>"
+    )
+
+
+def get_synthetic_site(
+    products: int,
+    people: int,
+    members_per_product: int = DEFAULT_MEMBERS_PER_PRODUCT,
+    seed: int = 0,
+) -> SyntheticSite:
+    """Generates products x people pages. Every person works on at least one
+    product, and each product's quarterly salary cost is the involvement-weighted
+    sum of its team's salaries, so the least squares estimate can recover them"""
+    rng = random.Random(seed)
+    product_names = [f"product-{i}" for i in range(products)]
+    person_ids = [f"person-{i}" for i in range(people)]
+    yearly_salaries = {
+        f"Person {i}": float(rng.randrange(MIN_YEARLY_SALARY, MAX_YEARLY_SALARY, 100))
+        for i in range(people)
+    }
+
+    members_by_product: list[set[int]] = [set() for _ in range(products)]
+    for i in range(people):
+        members_by_product[i % products].add(i)
+    for members in members_by_product:
+        extra_members = max(members_per_product - len(members), 0)
+        members.update(rng.sample(range(people), min(extra_members, people)))
+
+    pages: dict[str, str] = {OGP_PRODUCTS_URL: _get_products_page(product_names)}
+    for product_name, members in zip(product_names, members_by_product):
+        team_members = []
+        quarterly_salary_cost = 0.0
+        for i in sorted(members):
+            fraction = rng.choice(list(INVOLVEMENT_BY_FRACTION))
+            team_members.append(
+                (f"{OGP_BASE_URL}people/{person_ids[i]}", f"Person {i}", fraction)
+            )
+            quarterly_salary_cost += (
+                INVOLVEMENT_BY_FRACTION[fraction] * yearly_salaries[f"Person {i}"] / 4
+            )
+        costs = {
+            SALARY_HTML_TAG: quarterly_salary_cost,
+            INFRASTRUCTURE_HTML_TAG: rng.randrange(1_000, 50_000),
+            CORPORATE_OVERHEAD_HTML_TAG: rng.randrange(1_000, 50_000),
+            EQUIPMENT_SOFTWARE_AND_OFFICE_HTML_TAG: rng.randrange(1_000, 10_000),
+            OTHERS_HTML_TAG: rng.randrange(0, 5_000),
+        }
+        pages[f"{OGP_PRODUCTS_URL}{product_name}"] = _get_product_page(
+            product_name, costs, team_members
+        )
+
+    for i, person_id in enumerate(person_ids):
+        join_date = date(2015, 1, 1) + timedelta(days=rng.randrange(3000))
+        pages[f"{OGP_BASE_URL}people/{person_id}"] = _get_people_page(
+            person_id, f"Person {i}", "Software Engineer", join_date
+        )
+    return SyntheticSite(pages=pages, yearly_salaries=yearly_salaries)
+
+
+def save_fixtures(fixtures_dir: str, pages: dict[str, str]) -> ResponseCache:
+    """Writes pages as a fixture set that gateway.use_fixtures can replay"""
+    fixtures = ResponseCache(fixtures_dir)
+    for url, text in pages.items():
+        fixtures.set(
+            CachedResponse(
+                url=url,
+                text=text,
+                etag=f'"{hashlib.sha256(text.encode()).hexdigest()[:16]}"',
+                last_modified=None,
+                fetched_at=time.time(),
+            )
+        )
+    return fixtures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic fixture set of products x people pages"
+    )
+    parser.add_argument("fixtures_dir")
+    parser.add_argument("products", type=int)
+    parser.add_argument("people", type=int)
+    parser.add_argument(
+        "--members-per-product", type=int, default=DEFAULT_MEMBERS_PER_PRODUCT
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    synthetic_site = get_synthetic_site(
+        args.products, args.people, args.members_per_product, args.seed
+    )
+    save_fixtures(args.fixtures_dir, synthetic_site.pages)
+    print(f"Wrote {len(synthetic_site.pages)} pages to {args.fixtures_dir}")
@@ -6,6 +6,7 @@ from bs4 import BeautifulSoup, NavigableString
 
 from gateway import OGP_BASE_URL, get_ogp_api_people_info_response
 from models import OgpTeamMember
+from soup import get_soup
 
 PLACEHOLDER_URL = "https://www.open.gov.sg/people/charmaine"
 
@@ -70,15 +71,31 @@ def _get_staff_join_date(
     return join_date
 
 
-def get_team_member_info(team_member_url: str, default_name: str) -> OgpTeamMember:
-    ogp_api_people_info_response = get_ogp_api_people_info_response(team_member_url)
-    soup = BeautifulSoup(ogp_api_people_info_response, features="html.parser")
+TeamMemberValues = tuple[str, str, str, Optional[datetime]]
+
+
+def get_team_member_values(
+    ogp_api_people_info_response: str, default_name: str
+) -> TeamMemberValues:
+    """Profile picture, name, title and join date as a plain, picklable tuple"""
+    soup = get_soup(ogp_api_people_info_response)
+    return (
+        get_staff_profile_picture(soup),
+        _get_staff_name(soup, default_name),
+        _get_staff_title(soup),
+        _get_staff_join_date(soup),
+    )
 
-    profile_picture = get_staff_profile_picture(soup)
-    name = _get_staff_name(soup, default_name)
-    title = _get_staff_title(soup)
-    join_date = _get_staff_join_date(soup)
 
+def get_team_member_from_values(team_member_values: TeamMemberValues) -> OgpTeamMember:
+    profile_picture, name, title, join_date = team_member_values
     return OgpTeamMember(
         profile_picture=profile_picture, name=name, title=title, join_date=join_date
     )
+
+
+def get_team_member_info(team_member_url: str, default_name: str) -> OgpTeamMember:
+    ogp_api_people_info_response = get_ogp_api_people_info_response(team_member_url)
+    return get_team_member_from_values(
+        get_team_member_values(ogp_api_people_info_response, default_name)
+    )
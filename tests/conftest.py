@@ -0,0 +1,72 @@
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+import gateway
+import metrics
+from contribution import Contribution
+from http_cache import ResponseCache
+from synthetic import SyntheticSite, get_synthetic_site, save_fixtures
+
+# More products than people, so every synthetic salary is identified
+SYNTHETIC_PRODUCTS = 40
+SYNTHETIC_PEOPLE = 30
+SYNTHETIC_MEMBERS_PER_PRODUCT = 6
+
+
+@pytest.fixture(scope="session")
+def synthetic_site() -> SyntheticSite:
+    return get_synthetic_site(
+        SYNTHETIC_PRODUCTS, SYNTHETIC_PEOPLE, SYNTHETIC_MEMBERS_PER_PRODUCT
+    )
+
+
+@pytest.fixture(scope="session")
+def fixtures_dir(
+    synthetic_site: SyntheticSite, tmp_path_factory: pytest.TempPathFactory
+) -> Path:
+    fixtures_dir = tmp_path_factory.mktemp("fixtures")
+    save_fixtures(str(fixtures_dir), synthetic_site.pages)
+    return fixtures_dir
+
+
+@pytest.fixture
+def offline_gateway(fixtures_dir: Path, tmp_path: Path, monkeypatch):
+    """Replays the synthetic site through the gateway into an empty response
+    cache, with fresh counters"""
+    monkeypatch.setattr(gateway, "response_cache", ResponseCache(tmp_path / "http"))
+    monkeypatch.setattr(gateway, "BACKOFF_BASE_SECONDS", 0)
+    gateway.use_fixtures(str(fixtures_dir))
+    metrics.reset()
+    yield gateway
+    gateway.use_fixtures(None)
+
+
+@pytest.fixture(scope="session")
+def synthetic_contributions(
+    fixtures_dir: Path, tmp_path_factory: pytest.TempPathFactory
+) -> list[Contribution]:
+    """The synthetic site crawled once through the gateway"""
+    from crawl import iter_api_contributions
+
+    response_cache = gateway.response_cache
+    gateway.response_cache = ResponseCache(tmp_path_factory.mktemp("http"))
+    gateway.use_fixtures(str(fixtures_dir))
+    try:
+        return list(iter_api_contributions())
+    finally:
+        gateway.use_fixtures(None)
+        gateway.response_cache = response_cache
+
+
+@pytest.fixture
+def contributions_dir(
+    synthetic_contributions: list[Contribution], tmp_path: Path, monkeypatch
+) -> Path:
+    """A working directory holding the synthetic crawl as data.json"""
+    with open(tmp_path / "data.json", "w") as file:
+        json.dump([asdict(i) for i in synthetic_contributions], file)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,65 @@
+"""Per-stage timings of the offline pipeline on the synthetic site. Run only
+these with: python -m pytest tests/test_benchmarks.py --benchmark-only"""
+
+import itertools
+
+import pytest
+
+from contribution import _get_current_product_contribution_matrix
+from crawl import iter_api_contributions
+from gateway import OGP_PRODUCTS_URL
+from http_cache import ResponseCache
+from products import get_ogp_product_values
+from solver import solve_least_squares
+
+pytest.importorskip("pytest_benchmark")
+
+CRAWL_ROUNDS = 5
+
+
+def test_crawl(benchmark, offline_gateway, synthetic_contributions, tmp_path):
+    response_cache_dirs = (tmp_path / f"http-{i}" for i in itertools.count())
+
+    def _use_empty_response_cache():
+        offline_gateway.response_cache = ResponseCache(next(response_cache_dirs))
+
+    contributions = benchmark.pedantic(
+        lambda: list(iter_api_contributions()),
+        setup=_use_empty_response_cache,
+        rounds=CRAWL_ROUNDS,
+    )
+    assert contributions == synthetic_contributions
+
+
+def test_parse_product_pages(benchmark, synthetic_site):
+    product_pages = [
+        text
+        for url, text in synthetic_site.pages.items()
+        if url.startswith(OGP_PRODUCTS_URL) and url != OGP_PRODUCTS_URL
+    ]
+    ogp_products_values = benchmark(
+        lambda: [get_ogp_product_values(html) for html in product_pages]
+    )
+    assert len(ogp_products_values) == len(product_pages)
+
+
+def test_matrix_build(benchmark, synthetic_contributions):
+    product_contribution_matrix = benchmark(
+        _get_current_product_contribution_matrix, synthetic_contributions
+    )
+    assert product_contribution_matrix.matrix.shape == (
+        len({i.product_name for i in synthetic_contributions}),
+        len({i.team_member_name for i in synthetic_contributions}),
+    )
+
+
+def test_solve(benchmark, synthetic_contributions):
+    product_contribution_matrix = _get_current_product_contribution_matrix(
+        synthetic_contributions
+    )
+    solution = benchmark(
+        solve_least_squares,
+        product_contribution_matrix.matrix,
+        product_contribution_matrix.quarterly_product_costs,
+    )
+    assert solution.x.shape == (product_contribution_matrix.matrix.shape[1],)
@@ -0,0 +1,25 @@
+from bootstrap import get_team_members_yearly_salary_intervals
+
+REPLICATES = 50
+BATCH_SIZE = 10
+
+
+def test_bootstrap_is_reproducible_for_a_seed(contributions_dir):
+    intervals = get_team_members_yearly_salary_intervals(
+        replicates=REPLICATES, involvement_noise=0.05, seed=7, batch_size=BATCH_SIZE
+    )
+
+    assert intervals == get_team_members_yearly_salary_intervals(
+        replicates=REPLICATES, involvement_noise=0.05, seed=7, batch_size=BATCH_SIZE
+    )
+    assert intervals != get_team_members_yearly_salary_intervals(
+        replicates=REPLICATES, involvement_noise=0.05, seed=8, batch_size=BATCH_SIZE
+    )
+
+
+def test_bootstrap_does_not_depend_on_worker_count(contributions_dir):
+    assert get_team_members_yearly_salary_intervals(
+        replicates=REPLICATES, seed=7, batch_size=BATCH_SIZE, max_workers=1
+    ) == get_team_members_yearly_salary_intervals(
+        replicates=REPLICATES, seed=7, batch_size=BATCH_SIZE, max_workers=2
+    )
@@ -0,0 +1,29 @@
+import threading
+
+from concurrency import PREFETCH_PER_WORKER, imap_concurrently, map_concurrently
+
+MAX_WORKERS = 4
+
+
+def test_results_keep_input_order_and_errors():
+    def _invert(i: int) -> float:
+        return 1 / i
+
+    results = map_concurrently(_invert, range(-3, 4), MAX_WORKERS)
+    assert results[:3] + results[4:] == [1 / i for i in (-3, -2, -1, 1, 2, 3)]
+    assert isinstance(results[3], ZeroDivisionError)
+
+
+def test_submission_is_bounded_by_the_consumer():
+    started: list[int] = []
+    lock = threading.Lock()
+
+    def _start(i: int) -> int:
+        with lock:
+            started.append(i)
+        return i
+
+    results = imap_concurrently(_start, iter(range(1_000)), MAX_WORKERS)
+    assert next(results) == 0
+    assert len(started) <= MAX_WORKERS * PREFETCH_PER_WORKER + 1
+    results.close()
@@ -0,0 +1,123 @@
+from dataclasses import replace
+
+import pytest
+
+import contribution
+from columnar import convert_json_to_columns
+from contribution import (
+    IncrementalSalaryEstimator,
+    _get_current_product_contribution_matrix,
+    _get_team_members_yearly_salary_from_matrix,
+    get_output,
+    get_team_members_yearly_salary,
+)
+
+
+def _get_full_yearly_salaries(contributions) -> dict[str, float]:
+    return _get_team_members_yearly_salary_from_matrix(
+        _get_current_product_contribution_matrix(contributions, use_sparse=False)
+    )
+
+
+def _assert_same_salaries(actual: dict[str, float], expected: dict[str, float]):
+    assert actual.keys() == expected.keys()
+    for name, yearly_salary in expected.items():
+        assert actual[name] == pytest.approx(yearly_salary, rel=1e-6)
+
+
+def test_incremental_update_matches_full_solve(synthetic_contributions):
+    estimator = IncrementalSalaryEstimator()
+    _assert_same_salaries(
+        estimator.update(synthetic_contributions),
+        _get_full_yearly_salaries(synthetic_contributions),
+    )
+
+    # Raise one product's cost, drop another product and move a team member
+    changed_contributions = [
+        (
+            replace(i, product_salary_cost=i.product_salary_cost * 1.1)
+            if i.product_name == "product-1"
+            else i
+        )
+        for i in synthetic_contributions
+        if i.product_name != "product-2"
+    ]
+    changed_contributions[0] = replace(
+        changed_contributions[0], team_member_contribution=0.5
+    )
+    _assert_same_salaries(
+        estimator.update(changed_contributions),
+        _get_full_yearly_salaries(changed_contributions),
+    )
+    assert estimator.changed_products >= {"product-1", "product-2"}
+
+    _assert_same_salaries(
+        estimator.update(synthetic_contributions),
+        _get_full_yearly_salaries(synthetic_contributions),
+    )
+
+
+def test_incremental_update_with_fewer_products_than_team_members(
+    synthetic_contributions,
+):
+    # Ten products staff more team members than there are products, so the
+    # estimator factorizes A.T; adding the rest back flips it to A
+    few_products = {f"product-{i}" for i in range(10)}
+    contributions = [
+        i for i in synthetic_contributions if i.product_name in few_products
+    ]
+    estimator = IncrementalSalaryEstimator()
+    _assert_same_salaries(
+        estimator.update(contributions), _get_full_yearly_salaries(contributions)
+    )
+
+    changed_contributions = [
+        (
+            replace(i, product_salary_cost=i.product_salary_cost * 0.9)
+            if i.product_name == "product-3"
+            else i
+        )
+        for i in contributions
+        if i.product_name != "product-4"
+    ]
+    _assert_same_salaries(
+        estimator.update(changed_contributions),
+        _get_full_yearly_salaries(changed_contributions),
+    )
+    assert estimator.changed_products == {"product-3", "product-4"}
+
+    _assert_same_salaries(
+        estimator.update(synthetic_contributions),
+        _get_full_yearly_salaries(synthetic_contributions),
+    )
+
+
+def test_columnar_snapshot_matches_json(contributions_dir):
+    json_output = get_output()
+    json_yearly_salaries = get_team_members_yearly_salary()
+
+    convert_json_to_columns("data.json", "data.columns")
+    assert get_output() == json_output
+    _assert_same_salaries(get_team_members_yearly_salary(), json_yearly_salaries)
+
+
+def test_columnar_output_builds_no_contributions(contributions_dir, monkeypatch):
+    convert_json_to_columns("data.json", "data.columns")
+
+    def _iter_contributions(*args, **kwargs):
+        raise AssertionError("data.json was read despite a current snapshot")
+
+    monkeypatch.setattr(contribution, "_iter_contributions", _iter_contributions)
+    assert get_output()
+
+
+def test_stale_columnar_snapshot_is_ignored(contributions_dir):
+    convert_json_to_columns("data.json", "data.columns")
+    with open("data.json") as file:
+        data = file.read()
+    with open("data.json", "w") as file:
+        file.write(data.replace('"Person 0"', '"Person Zero"'))
+
+    names = {i.name for i in get_output()}
+    assert "Person Zero" in names
+    assert "Person 0" not in names
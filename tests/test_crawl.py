@@ -0,0 +1,91 @@
+import pytest
+
+import products
+from contribution import (
+    _get_current_product_contribution_matrix,
+    _get_team_members_yearly_salary_from_matrix,
+)
+from crawl import IncompleteCrawlError, iter_api_contributions
+from metrics import (
+    PARSE_CALLS,
+    PARSE_STAGE,
+    get_counters,
+    get_stage_timings,
+    reset,
+)
+
+# Product costs are rendered to the dollar, so estimates are only that close
+SALARY_TOLERANCE = 10
+
+
+def _get_yearly_salaries(contributions) -> dict[str, float]:
+    return _get_team_members_yearly_salary_from_matrix(
+        _get_current_product_contribution_matrix(contributions, use_sparse=False)
+    )
+
+
+@pytest.mark.parametrize("parse_workers", [None, 2])
+def test_crawl_recovers_synthetic_salaries(
+    offline_gateway, synthetic_site, parse_workers
+):
+    yearly_salaries = _get_yearly_salaries(
+        list(iter_api_contributions(parse_workers=parse_workers))
+    )
+
+    assert yearly_salaries.keys() == synthetic_site.yearly_salaries.keys()
+    for name, yearly_salary in synthetic_site.yearly_salaries.items():
+        assert yearly_salaries[name] == pytest.approx(
+            yearly_salary, abs=SALARY_TOLERANCE
+        )
+
+
+def test_parse_pool_matches_threaded_crawl(offline_gateway, synthetic_contributions):
+    assert list(iter_api_contributions(parse_workers=2)) == synthetic_contributions
+
+
+def test_parse_pool_reports_worker_metrics(offline_gateway):
+    list(iter_api_contributions())
+    parse_calls = get_counters()[PARSE_CALLS]
+    reset()
+
+    list(iter_api_contributions(parse_workers=2))
+    assert get_counters()[PARSE_CALLS] == parse_calls
+    assert get_stage_timings()[PARSE_STAGE].calls == parse_calls
+
+
+@pytest.fixture
+def unreachable_product(offline_gateway, monkeypatch) -> str:
+    """Makes product-3's page fail to fetch"""
+    get_ogp_api_product_info_response = products.get_ogp_api_product_info_response
+
+    def _get_ogp_api_product_info_response(path: str) -> str:
+        if path.endswith("/product-3"):
+            raise RuntimeError("unreachable")
+        return get_ogp_api_product_info_response(path)
+
+    monkeypatch.setattr(
+        products,
+        "get_ogp_api_product_info_response",
+        _get_ogp_api_product_info_response,
+    )
+    return "https://products.open.gov.sg/product-3"
+
+
+def test_failed_product_fails_get_ogp_products(unreachable_product):
+    with pytest.raises(IncompleteCrawlError) as error:
+        products.get_ogp_products()
+    assert [failure.path for failure in error.value.failures] == [unreachable_product]
+
+    ogp_products = products.get_ogp_products(allow_partial=True)
+    assert ogp_products
+    assert unreachable_product not in {i.path for i in ogp_products}
+
+
+def test_failed_product_fails_the_crawl(unreachable_product):
+    with pytest.raises(IncompleteCrawlError) as error:
+        list(iter_api_contributions())
+    assert [failure.path for failure in error.value.failures] == [unreachable_product]
+
+    contributions = list(iter_api_contributions(allow_partial=True))
+    assert contributions
+    assert "product-3" not in {i.product_name for i in contributions}
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+import requests
+
+import gateway
+from gateway import (
+    OGP_PRODUCTS_URL,
+    GatewayHttpError,
+    GatewayServerError,
+    OfflineCacheMissError,
+)
+from metrics import (
+    CACHE_HITS,
+    CACHE_REVALIDATIONS,
+    HTTP_REQUESTS,
+    get_counters,
+)
+
+
+def test_replays_fixtures(offline_gateway, synthetic_site):
+    assert (
+        gateway.get_ogp_api_products_response()
+        == synthetic_site.pages[OGP_PRODUCTS_URL]
+    )
+    assert get_counters()[HTTP_REQUESTS] == 1
+
+
+def test_async_replays_fixtures(offline_gateway, synthetic_site):
+    assert (
+        asyncio.run(gateway.async_get_ogp_api_products_response())
+        == synthetic_site.pages[OGP_PRODUCTS_URL]
+    )
+
+
+def test_fresh_pages_are_served_from_the_cache(offline_gateway):
+    first = gateway.get_ogp_api_products_response()
+    assert gateway.get_ogp_api_products_response() == first
+    assert get_counters()[HTTP_REQUESTS] == 1
+    assert get_counters()[CACHE_HITS] == 1
+
+
+def test_stale_pages_are_revalidated_with_304(offline_gateway, monkeypatch):
+    first = gateway.get_ogp_api_products_response()
+    monkeypatch.setattr(gateway, "CACHE_TTL_SECONDS", 0)
+
+    assert gateway.get_ogp_api_products_response() == first
+    assert asyncio.run(gateway.async_get_ogp_api_products_response()) == first
+    assert get_counters()[HTTP_REQUESTS] == 3
+    assert get_counters()[CACHE_REVALIDATIONS] == 2
+
+
+def test_revalidate_skips_the_freshness_check(offline_gateway):
+    first = gateway.get_ogp_api_products_response()
+
+    assert gateway.get_ogp_api_products_response(revalidate=True) == first
+    assert (
+        asyncio.run(gateway.async_get_ogp_api_products_response(revalidate=True))
+        == first
+    )
+    assert get_counters()[HTTP_REQUESTS] == 3
+    assert get_counters()[CACHE_REVALIDATIONS] == 2
+
+
+def test_offline_serves_stale_pages_without_requests(offline_gateway, monkeypatch):
+    first = gateway.get_ogp_api_products_response()
+    monkeypatch.setattr(gateway, "CACHE_TTL_SECONDS", 0)
+    monkeypatch.setattr(gateway, "OFFLINE", True)
+
+    assert gateway.get_ogp_api_products_response() == first
+    assert get_counters()[HTTP_REQUESTS] == 1
+
+
+def test_offline_cache_miss_raises(offline_gateway, monkeypatch):
+    monkeypatch.setattr(gateway, "OFFLINE", True)
+    with pytest.raises(OfflineCacheMissError):
+        gateway.get_ogp_api_products_response()
+    assert get_counters()[HTTP_REQUESTS] == 0
+
+
+def test_unknown_page_raises_http_error(offline_gateway):
+    url = f"{OGP_PRODUCTS_URL}missing"
+    with pytest.raises(GatewayHttpError) as error:
+        gateway.get_ogp_api_product_info_response(url)
+    assert error.value.status_code == 404
+    with pytest.raises(GatewayHttpError):
+        asyncio.run(gateway.async_get_ogp_api_product_info_response(url))
+    assert gateway.response_cache.get(url) is None
+
+
+class _StatusSession:
+    """Answers with each status in turn, then 200"""
+
+    def __init__(self, status_codes: list[int]) -> None:
+        self.status_codes = status_codes
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        response = requests.Response()
+        response.status_code = self.status_codes.pop(0) if self.status_codes else 200
+        response._content = b"ok"
+        response.url = url
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.mark.parametrize("status_code", [429, 503])
+def test_retries_429_and_5xx(offline_gateway, monkeypatch, status_code):
+    monkeypatch.setattr(gateway, "_session", _StatusSession([status_code] * 2))
+    assert gateway.get_ogp_api_products_response() == "ok"
+    assert get_counters()[HTTP_REQUESTS] == 3
+
+
+def test_gives_up_after_retries(offline_gateway, monkeypatch):
+    status_codes = [429] * (gateway.MAX_RETRIES + 1)
+    monkeypatch.setattr(gateway, "_session", _StatusSession(status_codes))
+    with pytest.raises(GatewayServerError) as error:
+        gateway.get_ogp_api_products_response()
+    assert error.value.status_code == 429
+
+
+def test_async_retries_429(offline_gateway, monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    status_codes = [429, 429]
+
+    def _handle_request(request):
+        return httpx.Response(status_codes.pop(0) if status_codes else 200, text="ok")
+
+    monkeypatch.setattr(
+        gateway,
+        "_async_client",
+        httpx.AsyncClient(transport=httpx.MockTransport(_handle_request)),
+    )
+    assert asyncio.run(gateway.async_get_ogp_api_products_response()) == "ok"
+    assert get_counters()[HTTP_REQUESTS] == 3
+
+
+def test_client_errors_are_not_retried(offline_gateway, monkeypatch):
+    monkeypatch.setattr(gateway, "_session", _StatusSession([403]))
+    with pytest.raises(GatewayHttpError) as error:
+        gateway.get_ogp_api_products_response()
+    assert not isinstance(error.value, GatewayServerError)
+    assert get_counters()[HTTP_REQUESTS] == 1
@@ -0,0 +1,83 @@
+from dataclasses import replace
+from datetime import date
+
+import pytest
+
+from history import SnapshotExistsError, SnapshotStore
+
+FIRST_DATE = date(2024, 1, 15)
+SECOND_DATE = date(2024, 4, 11)
+SALARY_TOLERANCE = 10
+
+
+@pytest.fixture
+def snapshot_store(tmp_path):
+    snapshot_store = SnapshotStore(tmp_path / "history.sqlite3")
+    yield snapshot_store
+    snapshot_store.close()
+
+
+def _raise_product_cost(contributions, product_name, factor):
+    return [
+        (
+            replace(i, product_salary_cost=i.product_salary_cost * factor)
+            if i.product_name == product_name
+            else i
+        )
+        for i in contributions
+    ]
+
+
+def test_append_snapshot_stores_its_contributions(
+    snapshot_store, synthetic_contributions
+):
+    snapshot_store.append_snapshot(FIRST_DATE, synthetic_contributions)
+
+    assert snapshot_store.get_snapshot_dates() == [FIRST_DATE]
+    assert snapshot_store.get_contributions(FIRST_DATE) == synthetic_contributions
+    assert snapshot_store.get_contributions(SECOND_DATE) == []
+
+
+def test_duplicate_date_raises(snapshot_store, synthetic_contributions):
+    snapshot_store.append_snapshot(FIRST_DATE, synthetic_contributions)
+
+    with pytest.raises(SnapshotExistsError):
+        snapshot_store.append_snapshot(FIRST_DATE, synthetic_contributions)
+    assert snapshot_store.get_snapshot_dates() == [FIRST_DATE]
+    assert snapshot_store.get_contributions(FIRST_DATE) == synthetic_contributions
+
+
+def test_team_member_salary_trajectory(
+    snapshot_store, synthetic_site, synthetic_contributions
+):
+    snapshot_store.append_snapshot(SECOND_DATE, synthetic_contributions)
+    snapshot_store.append_snapshot(FIRST_DATE, synthetic_contributions)
+
+    trajectory = snapshot_store.get_team_member_salary_trajectory("Person 0")
+    assert [point.snapshot_date for point in trajectory] == [FIRST_DATE, SECOND_DATE]
+    assert [point.quarter for point in trajectory] == ["2024Q1", "2024Q2"]
+    for point in trajectory:
+        assert point.yearly_salary == pytest.approx(
+            synthetic_site.yearly_salaries["Person 0"], abs=SALARY_TOLERANCE
+        )
+    assert snapshot_store.get_team_member_salary_trajectory("Nobody") == []
+
+
+def test_product_salary_trajectory(snapshot_store, synthetic_contributions):
+    snapshot_store.append_snapshot(FIRST_DATE, synthetic_contributions)
+    snapshot_store.append_snapshot(
+        SECOND_DATE, _raise_product_cost(synthetic_contributions, "product-1", 2)
+    )
+
+    product_contributions = [
+        i for i in synthetic_contributions if i.product_name == "product-1"
+    ]
+    quarterly_salary_cost = product_contributions[0].product_salary_cost
+    first, second = snapshot_store.get_product_salary_trajectory("product-1")
+    assert (first.snapshot_date, second.snapshot_date) == (FIRST_DATE, SECOND_DATE)
+    assert first.quarterly_salary_cost == quarterly_salary_cost
+    assert second.quarterly_salary_cost == 2 * quarterly_salary_cost
+    assert first.estimated_quarterly_salary_cost == pytest.approx(
+        quarterly_salary_cost, abs=SALARY_TOLERANCE
+    )
+    assert first.team_size == second.team_size == len(product_contributions)
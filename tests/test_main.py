@@ -0,0 +1,150 @@
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from gateway import OGP_BASE_URL
+from http_cache import ResponseCache
+from refresh_cache import AsyncRefreshingCache
+from synthetic import save_fixtures
+
+SALARY_TOLERANCE = 10
+
+
+@pytest.fixture
+def client(offline_gateway, monkeypatch):
+    """The API server with an empty staff cache, refreshed from the synthetic
+    site on start-up"""
+    monkeypatch.setattr(
+        main,
+        "staff_response_cache",
+        AsyncRefreshingCache(
+            main._compute_staff_response_index, main.STAFF_RESPONSE_TTL_SECONDS
+        ),
+    )
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_staff_salaries_recover_synthetic_salaries(client, synthetic_site):
+    response = client.get("/", params={"limit": main.MAX_PAGE_SIZE})
+
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == str(len(synthetic_site.yearly_salaries))
+    staff = response.json()
+    salaries = [i["salary"] for i in staff]
+    assert salaries == sorted(salaries, reverse=True)
+    for i in staff:
+        assert i["salary"] == pytest.approx(
+            synthetic_site.yearly_salaries[i["name"]], abs=SALARY_TOLERANCE
+        )
+
+
+def test_staff_salaries_are_paged(client):
+    all_staff = client.get("/", params={"limit": main.MAX_PAGE_SIZE}).json()
+
+    page = client.get("/", params={"offset": 5, "limit": 10}).json()
+    assert page == all_staff[5:15]
+    assert len(client.get("/").json()) == min(len(all_staff), main.DEFAULT_PAGE_SIZE)
+    assert client.get("/", params={"limit": main.MAX_PAGE_SIZE + 1}).status_code == 422
+
+
+def test_staff_salaries_filter_and_select_fields(client):
+    staff = client.get(
+        "/", params={"product": "product-1", "sort": "name", "order": "asc"}
+    ).json()
+    assert staff
+    assert all(
+        "product-1" in {product["name"] for product in i["product"]} for i in staff
+    )
+    names = [i["name"] for i in staff]
+    assert names == sorted(names, key=str.lower)
+
+    staff = client.get("/", params={"fields": "name,salary"}).json()
+    assert all(i.keys() == {"name", "salary"} for i in staff)
+    assert client.get("/", params={"fields": "name,password"}).status_code == 422
+
+
+def test_staff_salaries_schema_allows_field_subsets(client):
+    schema = client.get("/openapi.json").json()
+    parameters = {
+        parameter["name"]: parameter
+        for parameter in schema["paths"]["/"]["get"]["parameters"]
+    }
+    assert parameters["limit"]["schema"]["default"] == main.DEFAULT_PAGE_SIZE
+    assert (
+        schema["components"]["schemas"]["PartialStaffResponse"].get("required", [])
+        == []
+    )
+
+
+def test_stream_staff_salaries(client):
+    response = client.get("/staff.ndjson", params={"fields": "name"})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert (
+        lines
+        == client.get(
+            "/", params={"fields": "name", "limit": main.MAX_PAGE_SIZE}
+        ).json()
+    )
+
+
+def test_cache_status_and_refresh(client):
+    client.get("/")
+    cache_status = client.get("/cache").json()
+    assert cache_status["refreshed_at"] is not None
+    assert cache_status["is_stale"] is False
+    assert cache_status["last_error"] is None
+
+    response = client.post("/cache/refresh")
+    assert response.status_code == 202
+    assert response.json()["ttl_seconds"] == main.STAFF_RESPONSE_TTL_SECONDS
+
+
+def test_metrics(client):
+    client.get("/")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    samples = dict(
+        line.rsplit(" ", 1)
+        for line in response.text.splitlines()
+        if not line.startswith("#")
+    )
+    assert float(samples["ogp_http_requests_total"]) > 0
+    assert float(samples["ogp_parse_calls_total"]) > 0
+    for stage in ("http", "parse", "crawl", "matrix_build", "solve"):
+        assert f'ogp_stage_seconds_total{{stage="{stage}"}}' in samples
+
+
+@pytest.fixture
+def site_fixtures_dir(offline_gateway, synthetic_site, tmp_path):
+    """A fixture set of the synthetic site that a test can change"""
+    site_fixtures_dir = tmp_path / "site"
+    save_fixtures(str(site_fixtures_dir), synthetic_site.pages)
+    offline_gateway.use_fixtures(str(site_fixtures_dir))
+    return site_fixtures_dir
+
+
+def test_cache_refresh_picks_up_changed_pages(site_fixtures_dir, client):
+    params = {"title": "Product Manager"}
+    assert client.get("/", params=params).json() == []
+
+    people_url = f"{OGP_BASE_URL}people/person-0"
+    people_page = ResponseCache(site_fixtures_dir).get(people_url)
+    save_fixtures(
+        str(site_fixtures_dir),
+        {people_url: people_page.text.replace("Software Engineer", "Product Manager")},
+    )
+    assert client.post("/cache/refresh").status_code == 202
+    for _ in range(100):
+        if not client.get("/cache").json()["is_refreshing"]:
+            break
+        time.sleep(0.05)
+
+    assert [i["name"] for i in client.get("/", params=params).json()] == ["Person 0"]
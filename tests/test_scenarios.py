@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from contribution import (
+    _get_current_product_contribution_matrix,
+    _get_yearly_salary,
+    get_team_members_yearly_salary,
+)
+from scenarios import Scenario, solve_scenarios
+
+INVOLVEMENT_CAP = 0.5
+
+
+def test_unscaled_scenario_matches_the_baseline_estimate(contributions_dir):
+    result = solve_scenarios([Scenario("baseline", cost_scale=1.0)])
+    yearly_salaries = get_team_members_yearly_salary()
+
+    assert result.scenario_names == ["baseline"]
+    assert sorted(result.team_member_names) == sorted(yearly_salaries)
+    for name, yearly_salary in zip(result.team_member_names, result.yearly_salaries[0]):
+        assert yearly_salary == pytest.approx(yearly_salaries[name], rel=1e-6)
+
+
+def test_involvement_cap_matches_a_solve_of_the_capped_matrix(
+    contributions_dir, synthetic_contributions
+):
+    product_contribution_matrix = _get_current_product_contribution_matrix(
+        synthetic_contributions, use_sparse=False
+    )
+    capped_matrix = np.minimum(product_contribution_matrix.matrix, INVOLVEMENT_CAP)
+    assert (capped_matrix != product_contribution_matrix.matrix).any()
+    quarterly_salaries = np.linalg.lstsq(
+        capped_matrix,
+        product_contribution_matrix.quarterly_product_costs * 0.7,
+        rcond=None,
+    )[0]
+
+    result = solve_scenarios(
+        [
+            Scenario("baseline"),
+            Scenario("capped", cost_scale=0.7, involvement_cap=INVOLVEMENT_CAP),
+        ]
+    )
+
+    assert list(result.team_member_names) == list(
+        product_contribution_matrix.team_member_names
+    )
+    np.testing.assert_allclose(
+        result.yearly_salaries[1], _get_yearly_salary(quarterly_salaries), rtol=1e-6
+    )
+    assert not np.allclose(result.yearly_salaries[0], result.yearly_salaries[1])
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import solver
+from contribution import _get_current_product_contribution_matrix
+from solver import DENSE_BACKEND, LSMR_BACKEND, LSQR_BACKEND, solve_least_squares
+
+pytest.importorskip("scipy")
+
+
+@pytest.fixture
+def contribution_matrix(synthetic_contributions):
+    return _get_current_product_contribution_matrix(
+        synthetic_contributions, use_sparse=True
+    )
+
+
+@pytest.mark.parametrize("backend", [LSQR_BACKEND, LSMR_BACKEND])
+def test_iterative_backends_converge_to_the_dense_solution(
+    contribution_matrix, backend
+):
+    b = contribution_matrix.quarterly_product_costs
+    dense_solution = solve_least_squares(contribution_matrix.matrix, b, DENSE_BACKEND)
+    solution = solve_least_squares(contribution_matrix.matrix, b, backend)
+
+    assert solution.converged
+    assert solution.istop in solver.ITERATIVE_CONVERGED_ISTOPS
+    assert solution.x == pytest.approx(dense_solution.x, rel=1e-6)
+
+
+def test_iteration_limit_is_reported(contribution_matrix, monkeypatch):
+    monkeypatch.setattr(solver, "ITERATIVE_MIN_MAX_ITERATIONS", 1)
+    monkeypatch.setattr(solver, "ITERATIVE_MAX_ITERATIONS_FACTOR", 0)
+    solution = solve_least_squares(
+        contribution_matrix.matrix,
+        np.asarray(contribution_matrix.quarterly_product_costs),
+        LSMR_BACKEND,
+    )
+
+    assert solution.iterations == 1
+    assert solution.istop == 7
+    assert not solution.converged